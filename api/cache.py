@@ -0,0 +1,103 @@
+"""
+Commentary Cache
+Üretilen AI yorumlarını kişilik çifti + skor bandına göre saklar
+"""
+
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+import random
+import time
+
+from .metrics import CACHE_LOOKUPS
+
+
+class CommentaryCache:
+    """
+    LRU + TTL cache
+    Her anahtar için birden fazla varyant tutar, böylece aynı çift her seferinde
+    aynı yorumu görmez. Varyant sayısı dolana kadar get() miss döner.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 24 * 3600, variants: int = 3,
+                 name: str = "commentary"):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.variants = max(1, variants)
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, List[str]]]" = OrderedDict()
+
+    @staticmethod
+    def match_key(type1: str, type2: str, score: float, band_size: int = 10) -> Tuple:
+        """Sırasız tip çifti + skor bandı anahtarı"""
+        low, high = sorted((type1, type2))
+        return ("match", low, high, int(score // band_size))
+
+    @staticmethod
+    def reveal_key(personality_type: str) -> Tuple:
+        """Kişilik açıklaması anahtarı"""
+        return ("reveal", personality_type)
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """Yeterli varyant varsa rastgele birini döner, yoksa None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return self._miss()
+
+        expires_at, values = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return self._miss()
+
+        if len(values) < self.variants:
+            # Daha fazla çeşitlilik için yeni üretim yapılsın
+            return self._miss()
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        CACHE_LOOKUPS.inc(cache=self.name, result="hit")
+        return random.choice(values)
+
+    def _miss(self) -> None:
+        self.misses += 1
+        CACHE_LOOKUPS.inc(cache=self.name, result="miss")
+        return None
+
+    def peek(self, key: Hashable) -> Optional[str]:
+        """Varyant sayısına bakmadan mevcut bir varyantı döner (sayaçları etkilemez)"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return random.choice(entry[1])
+
+    def put(self, key: Hashable, value: str) -> None:
+        """Yeni varyant ekler, gerekirse en eski anahtarı atar"""
+        entry = self._entries.get(key)
+        now = time.monotonic()
+
+        if entry is None or entry[0] <= now:
+            self._entries[key] = (now + self.ttl, [value])
+        else:
+            values = entry[1]
+            if value not in values and len(values) < self.variants:
+                values.append(value)
+
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict:
+        """Hit/miss sayaçları"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0
+        }
@@ -0,0 +1,128 @@
+"""
+Candidate Index
+Kişilik tipi, token tercihi ve risk bandına göre posting list'ler
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+import random
+
+RISK_BAND_SIZE = 20
+
+
+def risk_band(risk_tolerance: int) -> int:
+    return int(risk_tolerance) // RISK_BAND_SIZE
+
+
+class _PostingList:
+    """O(1) ekleme/silme yapan FID listesi (swap-remove)"""
+
+    __slots__ = ("items", "positions")
+
+    def __init__(self):
+        self.items: List[int] = []
+        self.positions: Dict[int, int] = {}
+
+    def add(self, fid: int) -> None:
+        if fid not in self.positions:
+            self.positions[fid] = len(self.items)
+            self.items.append(fid)
+
+    def discard(self, fid: int) -> None:
+        position = self.positions.pop(fid, None)
+        if position is None:
+            return
+        last = self.items.pop()
+        if last != fid:
+            self.items[position] = last
+            self.positions[last] = position
+
+    def iter_from(self, offset: int) -> Iterator[int]:
+        """Rastgele bir noktadan başlayarak dairesel gezinir"""
+        size = len(self.items)
+        for step in range(size):
+            yield self.items[(offset + step) % size]
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+class CandidateIndex:
+    """
+    Aday getirme indeksi
+    Önce ideal_match tipleri, sonra ortak token, sonra yakın risk bandı,
+    en son diğer tipler; avoid tipleri hiç dönmez. Maliyet limit ile orantılıdır.
+    """
+
+    def __init__(self, rng: Optional[random.Random] = None):
+        self.rng = rng or random.Random()
+        self._by_type: Dict[str, _PostingList] = {}
+        self._by_token: Dict[str, _PostingList] = {}
+        self._by_risk: Dict[int, _PostingList] = {}
+        self._entries: Dict[int, Dict] = {}
+
+    def add(self, fid: int, personality_type: str, profile: Dict) -> None:
+        """FID'i indeksler; tipi değiştiyse eski posting'lerden çıkarır"""
+        current = self._entries.get(fid)
+        if current is not None:
+            if current["personality_type"] == personality_type and current["profile"] is profile:
+                return
+            self.remove(fid)
+
+        self._entries[fid] = {"personality_type": personality_type, "profile": profile}
+        self._posting(self._by_type, personality_type).add(fid)
+        for token in profile["token_preference"]:
+            self._posting(self._by_token, token).add(fid)
+        self._posting(self._by_risk, risk_band(profile["risk_tolerance"])).add(fid)
+
+    def add_analyses(self, analyses: Iterable[Dict]) -> None:
+        """analyze_from_fid / analyze_many çıktılarını indeksler"""
+        for analysis in analyses:
+            self.add(analysis["fid"], analysis["personality_type"], analysis["profile"])
+
+    def remove(self, fid: int) -> None:
+        entry = self._entries.pop(fid, None)
+        if entry is None:
+            return
+        profile = entry["profile"]
+        self._by_type[entry["personality_type"]].discard(fid)
+        for token in profile["token_preference"]:
+            self._by_token[token].discard(fid)
+        self._by_risk[risk_band(profile["risk_tolerance"])].discard(fid)
+
+    def retrieve(self, user_fid: int, user_profile: Dict, limit: int) -> List[int]:
+        """En olası eşleşmelerden başlayarak en fazla limit aday döner"""
+        avoid: Set[str] = set(user_profile.get("avoid", []))
+        ideal = [t for t in user_profile.get("ideal_match", []) if t not in avoid]
+        band = risk_band(user_profile["risk_tolerance"])
+
+        tiers = [self._by_type.get(t) for t in ideal]
+        tiers += [self._by_token.get(token) for token in user_profile["token_preference"]]
+        tiers += [self._by_risk.get(b) for b in (band, band - 1, band + 1)]
+        tiers += [posting for t, posting in self._by_type.items()
+                  if t not in avoid and t not in ideal]
+
+        seen = {user_fid}
+        result: List[int] = []
+        for posting in tiers:
+            if not posting:
+                continue
+            for fid in posting.iter_from(self.rng.randrange(len(posting))):
+                if fid in seen:
+                    continue
+                seen.add(fid)
+                if self._entries[fid]["personality_type"] in avoid:
+                    continue
+                result.append(fid)
+                if len(result) >= limit:
+                    return result
+        return result
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _posting(table: Dict, key) -> _PostingList:
+        posting = table.get(key)
+        if posting is None:
+            posting = table[key] = _PostingList()
+        return posting
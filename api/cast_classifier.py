@@ -0,0 +1,334 @@
+"""
+Cast Classifier
+Cast geçmişinden kişilik tipi: JSONL cast dosyaları paralel okunur, FID başına
+token/trait sinyalleri sayılır ve PERSONALITY_PROFILES ağırlıklarıyla skorlanır
+
+Kullanım (repo kökünden):
+    python -m api.cast_classifier casts/*.jsonl --workers 8
+    python -m api.cast_classifier casts.jsonl.gz --store-url sqlite:////data/profiles.db
+"""
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+from .personality import PERSONALITY_PROFILES, PERSONALITY_TYPES
+from .profile_store import ProfileStore, create_backend, get_default_store
+
+# Profil özelliği -> cast'lerde aranan kelimeler (küçük harf, $ön eki opsiyonel)
+FEATURE_KEYWORDS: Dict[str, List[str]] = {
+    # Tokenlar
+    "BTC": ["btc", "bitcoin", "sats", "satoshi", "lightning", "ordinals"],
+    "ETH": ["eth", "ethereum", "vitalik", "ether"],
+    "UNI": ["uni", "uniswap"],
+    "AAVE": ["aave"],
+    "CRV": ["crv", "curve", "convex"],
+    "random_tokens": ["airdrop", "points", "testnet"],
+    "APE": ["ape", "bayc", "apecoin"],
+    "LOOKS": ["looks", "looksrare"],
+    "yeni_tokenlar": ["presale", "fair launch", "new token", "stealth launch"],
+    "meme_coins": ["memecoin", "meme coin", "memecoins"],
+    "random_gems": ["gem", "gems", "100x", "1000x"],
+    "top_10_only": ["top 10", "blue chip", "bluechip"],
+    "layer2s": ["l2", "layer2", "layer 2", "rollup", "rollups", "base", "optimism", "arbitrum"],
+    "ETH_ecosystem": ["eip", "evm", "solidity", "erc20", "erc-20"],
+    "DOGE": ["doge", "dogecoin"],
+    "SHIB": ["shib", "shiba"],
+    "PEPE": ["pepe"],
+    "latest_meme": ["degen", "wif", "bonk", "higher"],
+    "governance_tokens": ["governance", "snapshot", "delegate", "delegates"],
+    "COMP": ["comp", "compound"],
+    "top_caps": ["market cap", "marketcap", "dominance"],
+    "whale_holdings": ["whale", "whales", "whale alert", "onchain data"],
+    "XMR": ["xmr", "monero"],
+    "ZEC": ["zec", "zcash"],
+    "privacy_coins": ["privacy coin", "tornado", "mixer"],
+    # Özellikler
+    "loyal": ["loyal", "never selling", "forever"],
+    "conservative": ["conservative", "safe", "low risk"],
+    "skeptical": ["scam", "ponzi", "shitcoin", "rug"],
+    "long_term": ["hodl", "long term", "long-term", "accumulate", "dca"],
+    "risky": ["leverage", "100x long", "liquidated", "margin"],
+    "adventurous": ["aped", "aping", "yolo"],
+    "FOMO": ["fomo", "missed out", "ngmi"],
+    "24_7_trader": ["trading", "chart", "charts", "scalp", "perps"],
+    "artistic": ["art", "artist", "artwork", "generative"],
+    "cultured": ["gallery", "curated", "collector", "collection"],
+    "trend_setter": ["early", "alpha", "trend"],
+    "community_focused": ["community", "frens", "gm"],
+    "gambler": ["gamble", "casino", "degen play", "lottery"],
+    "optimistic": ["wagmi", "bullish", "lfg"],
+    "impulsive": ["just bought", "bought the top", "insta buy"],
+    "moonboy": ["moon", "wen moon", "to the moon", "pump"],
+    "careful": ["careful", "cold wallet", "ledger", "diversify"],
+    "rational": ["fundamentals", "valuation", "macro"],
+    "tech_savvy": ["node", "client", "validator", "zk"],
+    "innovative": ["innovation", "experiment", "research"],
+    "ecosystem_believer": ["ecosystem", "ultrasound", "ultra sound"],
+    "builder": ["building", "shipped", "shipping", "deployed", "hackathon", "buidl"],
+    "funny": ["lol", "lmao", "😂", "🤣"],
+    "community_driven": ["raid", "shill", "army"],
+    "viral_hunter": ["viral", "trending", "meme"],
+    "ironic": ["ser", "probably nothing", "few understand"],
+    "democratic": ["vote", "voting", "proposal", "quorum"],
+    "organized": ["roadmap", "treasury", "multisig"],
+    "visionary": ["future", "vision", "coordination"],
+    "community_first": ["dao", "daos", "public goods"],
+    "analytical": ["dune", "dashboard", "analysis", "metrics"],
+    "strategic": ["strategy", "position", "rotation"],
+    "patient": ["patience", "patient", "waiting"],
+    "data_driven": ["data", "onchain", "on-chain", "nansen", "arkham"],
+    "private": ["privacy", "private"],
+    "paranoid": ["surveillance", "kyc", "doxxed"],
+    "security_focused": ["security", "audit", "exploit", "opsec"],
+    "anonymous": ["anon", "anonymous", "pseudonymous"],
+}
+
+FEATURES: List[str] = list(FEATURE_KEYWORDS)
+FEATURE_INDEX: Dict[str, int] = {feature: index for index, feature in enumerate(FEATURES)}
+
+_KEYWORD_COLUMN: Dict[str, int] = {
+    keyword: FEATURE_INDEX[feature]
+    for feature, keywords in FEATURE_KEYWORDS.items() for keyword in keywords
+}
+# Uzun kelimeler önce: "wen moon" "moon"dan önce eşleşsin
+_KEYWORD_PATTERN = re.compile(
+    r"(?<![\w$])\$?(" + "|".join(
+        re.escape(keyword) for keyword in sorted(_KEYWORD_COLUMN, key=len, reverse=True)
+    ) + r")(?!\w)"
+)
+
+
+def _build_type_weights() -> np.ndarray:
+    """
+    (tip, özellik) ağırlık matrisi
+    Bir özellik kaç tipte geçiyorsa ağırlığı o kadar bölünür (ETH üç tipte
+    geçtiği için tek başına ayırt edici değil)
+    """
+    weights = np.zeros((len(PERSONALITY_TYPES), len(FEATURES)), dtype=np.float32)
+    for type_index, personality_type in enumerate(PERSONALITY_TYPES):
+        profile = PERSONALITY_PROFILES[personality_type]
+        for feature in profile["token_preference"] + profile["traits"]:
+            if feature in FEATURE_INDEX:
+                weights[type_index, FEATURE_INDEX[feature]] = 1.0
+    document_frequency = np.maximum(weights.sum(axis=0), 1.0)
+    return weights / document_frequency
+
+
+TYPE_WEIGHTS = _build_type_weights()
+
+
+def extract_features(text: str) -> List[int]:
+    """Bir cast metnindeki özellik kolonları (tekrarlar dahil)"""
+    return [_KEYWORD_COLUMN[match] for match in _KEYWORD_PATTERN.findall(text.lower())]
+
+
+def parse_cast(line: bytes) -> Optional[Tuple[int, Optional[int], str]]:
+    """
+    JSONL satırından (fid, timestamp, text)
+    Düz {"fid", "timestamp", "text"} ya da hub mesajı
+    {"data": {"fid", "timestamp", "castAddBody": {"text"}}}; timestamp yoksa None
+    """
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(record, dict):
+        return None
+    data = record.get("data") if "fid" not in record else record
+    if not isinstance(data, dict):
+        return None
+    fid = data.get("fid")
+    text = data.get("text")
+    if text is None:
+        text = (data.get("castAddBody") or {}).get("text")
+    if not isinstance(fid, int) or not isinstance(text, str):
+        return None
+    timestamp = data.get("timestamp")
+    return fid, timestamp if isinstance(timestamp, int) else None, text
+
+
+def _open(path: str):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def _iter_lines(path: str, start: int, end: Optional[int]) -> Iterator[bytes]:
+    """[start, end) byte aralığında *başlayan* satırlar (parçalar çakışmaz)"""
+    with _open(path) as f:
+        if start:
+            f.seek(start - 1)
+            f.readline()
+        while end is None or f.tell() < end:
+            line = f.readline()
+            if not line:
+                return
+            yield line
+
+
+def shard_files(paths: Iterable[str], shard_bytes: int) -> List[Tuple[str, int, Optional[int]]]:
+    """Büyük düz dosyaları byte aralıklarına böler; .gz dosyalar bölünemez"""
+    shards = []
+    for path in paths:
+        size = os.path.getsize(path)
+        if path.endswith(".gz") or size <= shard_bytes:
+            shards.append((path, 0, None))
+            continue
+        for start in range(0, size, shard_bytes):
+            shards.append((path, start, min(start + shard_bytes, size)))
+    return shards
+
+
+# (fids, özellik sayıları [fid x özellik], cast sayıları, son cast timestamp'i,
+#  timestamp'siz atlanan cast sayısı)
+FeatureCounts = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, int]
+
+
+def count_features(shard: Tuple[str, int, Optional[int]],
+                   watermark: Optional[Callable[[int], int]] = None) -> FeatureCounts:
+    """
+    Worker: bir parçadaki cast'leri okur
+    watermark verilirse timestamp'i FID'in watermark'ından büyük olmayan
+    (daha önce işlenmiş) cast'ler atlanır. Watermark "bu saniye dahil her şey
+    görüldü" demektir: export dilimleri saniye sınırında kesilmelidir, aksi halde
+    sonraki dilimde watermark'la aynı timestamp'li cast sayılmaz.
+    Timestamp'i olmayan cast'ler tekrar işlenip işlenmediği bilinemediği için
+    her modda atlanır ve ayrıca sayılır (tam ve artımlı sonuç aynı kalsın).
+    """
+    path, start, end = shard
+    fid_rows: Dict[int, int] = {}
+    floors: Dict[int, int] = {}
+    pair_rows, pair_columns = array("q"), array("q")
+    cast_rows = array("q")
+    latest = array("q")
+    untimestamped = 0
+    for line in _iter_lines(path, start, end):
+        parsed = parse_cast(line)
+        if parsed is None:
+            continue
+        fid, timestamp, text = parsed
+        if timestamp is None:
+            untimestamped += 1
+            continue
+        if watermark is not None:
+            floor = floors.get(fid)
+            if floor is None:
+                floor = floors[fid] = watermark(fid)
+            if timestamp <= floor:
+                continue
+        row = fid_rows.get(fid)
+        if row is None:
+            row = fid_rows[fid] = len(fid_rows)
+            latest.append(timestamp)
+        elif timestamp > latest[row]:
+            latest[row] = timestamp
+        cast_rows.append(row)
+        for column in extract_features(text):
+            pair_rows.append(row)
+            pair_columns.append(column)
+
+    fids = np.fromiter(fid_rows, dtype=np.int64, count=len(fid_rows))
+    counts = np.zeros((len(fid_rows), len(FEATURES)), dtype=np.float32)
+    np.add.at(counts, (np.frombuffer(pair_rows, dtype=np.int64),
+                       np.frombuffer(pair_columns, dtype=np.int64)), 1.0)
+    casts = np.bincount(np.frombuffer(cast_rows, dtype=np.int64), minlength=len(fid_rows))
+    return (fids, counts, casts, np.frombuffer(latest, dtype=np.int64).copy(),
+            untimestamped)
+
+
+def merge_counts(parts: Iterable[FeatureCounts]) -> FeatureCounts:
+    """Worker çıktılarını FID bazında toplar (aynı FID birden çok parçada olabilir)"""
+    parts = list(parts)
+    untimestamped = sum(part[4] for part in parts)
+    parts = [part for part in parts if part[0].size]
+    if not parts:
+        return (np.zeros(0, dtype=np.int64), np.zeros((0, len(FEATURES)), dtype=np.float32),
+                np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), untimestamped)
+    fids, counts, casts, latest = (np.concatenate([part[i] for part in parts]) for i in range(4))
+    order = np.argsort(fids, kind="stable")
+    fids, counts, casts, latest = fids[order], counts[order], casts[order], latest[order]
+    starts = np.flatnonzero(np.r_[True, fids[1:] != fids[:-1]])
+    return (fids[starts], np.add.reduceat(counts, starts, axis=0),
+            np.add.reduceat(casts, starts), np.maximum.reduceat(latest, starts), untimestamped)
+
+
+def classify_counts(counts: np.ndarray, min_signal: float = 3.0) -> np.ndarray:
+    """
+    Özellik sayılarından tip indeksleri (PERSONALITY_TYPES sırası)
+    Toplam sinyali min_signal'in altında kalan FID'ler -1 (sınıflanmadı)
+    """
+    if counts.shape[0] == 0:
+        return np.zeros(0, dtype=np.int64)
+    # log1p: tek bir kelimeyi spam'leyen hesap skoru domine etmesin
+    scores = np.log1p(counts) @ TYPE_WEIGHTS.T
+    types = np.argmax(scores, axis=1)
+    weak = (counts.sum(axis=1) < min_signal) | (scores.max(axis=1) <= 0)
+    types[weak] = -1
+    return types
+
+
+def classify_casts(paths: Iterable[str], store: Optional[ProfileStore] = None,
+                   workers: Optional[int] = None, shard_bytes: int = 64 * 1024 * 1024,
+                   min_signal: float = 3.0, batch_size: int = 10_000) -> Dict:
+    """
+    Cast dosyalarını process pool'da işler, sonuçları store'a yazar
+    Sınıflanamayan FID'ler store'a yazılmaz (mevcut tipleri korunur)
+    """
+    started = time.perf_counter()
+    store = store or get_default_store()
+    shards = shard_files(paths, shard_bytes)
+
+    if workers == 1 or len(shards) == 1:
+        parts = [count_features(shard) for shard in shards]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(count_features, shards))
+
+    fids, counts, casts, _, untimestamped = merge_counts(parts)
+    types = classify_counts(counts, min_signal)
+
+    classified = np.flatnonzero(types >= 0)
+    for offset in range(0, classified.size, batch_size):
+        rows = classified[offset:offset + batch_size]
+        store.put_many({int(fids[row]): PERSONALITY_TYPES[types[row]] for row in rows})
+
+    distribution = np.bincount(types[classified], minlength=len(PERSONALITY_TYPES))
+    return {
+        "shards": len(shards),
+        "casts": int(casts.sum()),
+        "skipped_untimestamped": untimestamped,
+        "fids": int(fids.size),
+        "classified": int(classified.size),
+        "types": {personality_type: int(count)
+                  for personality_type, count in zip(PERSONALITY_TYPES, distribution)},
+        "seconds": round(time.perf_counter() - started, 2)
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="JSONL cast dosyaları (.gz olabilir)")
+    parser.add_argument("--workers", type=int, default=None, help="process sayısı (varsayılan: CPU)")
+    parser.add_argument("--shard-mb", type=int, default=64)
+    parser.add_argument("--min-signal", type=float, default=3.0,
+                        help="sınıflamak için gereken minimum eşleşen kelime sayısı")
+    parser.add_argument("--store-url", default=None, help="PROFILE_STORE_URL yerine")
+    args = parser.parse_args(argv)
+
+    store = ProfileStore(create_backend(args.store_url)) if args.store_url else None
+    stats = classify_casts(args.paths, store, args.workers, args.shard_mb * 1024 * 1024,
+                           args.min_signal)
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Circuit Breaker
+Dış bağımlılık (OpenAI) çökünce çağrıları beklemeden kesen devre kesici
+"""
+
+from typing import Dict, Optional
+import time
+
+from .metrics import CIRCUIT_TRANSITIONS
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Devre açıkken yapılan çağrı - caller hemen fallback'e geçmeli"""
+
+
+class CircuitBreaker:
+    """
+    Ardışık hata/yavaş çağrı sayacı ile çalışan devre kesici
+
+    closed    -> failure_threshold ardışık başarısız ya da slow_call_threshold
+                 saniyeden uzun çağrıdan sonra open
+    open      -> reset_timeout boyunca tüm çağrılar reddedilir, sonra half_open
+    half_open -> en fazla half_open_max_calls deneme çağrısı geçer; başarılı
+                 olursa closed, başarısız olursa tekrar open
+    """
+
+    def __init__(self, name: str = "llm", failure_threshold: int = 5,
+                 slow_call_threshold: float = 5.0, reset_timeout: float = 30.0,
+                 half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_threshold = slow_call_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._transition(HALF_OPEN)
+        return self._state
+
+    def allow(self) -> bool:
+        """
+        Çağrı yapılabilir mi? True dönerse sonuç record_success/record_failure
+        ile mutlaka bildirilmeli (half-open deneme hakkı buna bağlı)
+        """
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and self._probes < self.half_open_max_calls:
+            self._probes += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self, duration: Optional[float] = None) -> None:
+        if duration is not None and duration > self.slow_call_threshold:
+            # Cevap geldi ama çok geç: kullanıcı açısından hata ile aynı
+            self.record_failure()
+            return
+        self._failures = 0
+        if self._state != CLOSED:
+            self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+            self._transition(OPEN)
+
+    def release(self) -> None:
+        """İzin alınan çağrı sonuçlanmadan iptal edildi (ör. client koptu)"""
+        if self._state == HALF_OPEN and self._probes:
+            self._probes -= 1
+
+    def stats(self) -> Dict:
+        state = self.state
+        stats = {
+            "state": state,
+            "consecutive_failures": self._failures,
+            "rejected": self.rejected
+        }
+        if state == OPEN:
+            stats["retry_in"] = round(max(0.0, self.reset_timeout
+                                          - (time.monotonic() - self._opened_at)), 1)
+        return stats
+
+    def _transition(self, state: str) -> None:
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        if state == CLOSED:
+            self._failures = 0
+        self._probes = 0
+        if state != self._state:
+            self._state = state
+            CIRCUIT_TRANSITIONS.inc(breaker=self.name, state=state)
@@ -4,17 +4,76 @@ OpenAI GPT-4 kullanarak komik yorumlar üretir
 """
 
 import os
-from openai import OpenAI
-from typing import Dict, List
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 import random
 
+from .cache import CommentaryCache
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .commentary_queue import CommentaryQueue
+from .metrics import LLM_CALLS, LLM_COALESCED, LLM_FALLBACKS, stage
+from .singleflight import SingleFlight
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+MATCH_SYSTEM_PROMPT = "Sen eğlenceli bir crypto dating komedyenisin."
+
+
 class ComedyGenerator:
     """AI destekli komedi üretim motoru"""
     
     def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        # Tek bir yavaş completion tüm event loop'u kilitlemesin diye async client;
+        # cold start'ta ödenmesin diye ilk LLM çağrısında kurulur (bkz. client)
+        self.timeout = float(os.getenv("OPENAI_TIMEOUT", "8"))
+        self._client = None
+        # OpenAI çökünce timeout beklemeden template'e düş
+        self.breaker = CircuitBreaker(
+            name="openai",
+            failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+            slow_call_threshold=float(os.getenv("LLM_BREAKER_SLOW_CALL", str(self.timeout * 0.75))),
+            reset_timeout=float(os.getenv("LLM_BREAKER_RESET", "30"))
+        )
+        # Aynı tip çifti + skor bandı için tekrar tekrar GPT-4'e gitme
+        self.score_band = int(os.getenv("COMMENTARY_SCORE_BAND", "10"))
+        self.cache = CommentaryCache(
+            max_entries=int(os.getenv("COMMENTARY_CACHE_SIZE", "512")),
+            ttl=float(os.getenv("COMMENTARY_CACHE_TTL", str(24 * 3600))),
+            variants=int(os.getenv("COMMENTARY_VARIANTS", "3"))
+        )
+        # Aynı prompt'la eşzamanlı çağrılar tek completion'ı paylaşır
+        self.inflight = SingleFlight()
+        # Frame cevabını bekletmemek için AI üretimi arka planda
+        self.queue = CommentaryQueue(workers=int(os.getenv("COMMENTARY_WORKERS", "2")))
         self.comedy_templates = self._load_templates()
     
+    async def _get_client(self) -> "AsyncOpenAI":
+        """
+        OpenAI client - openai paketinin import'u cold start'ın en pahalı kısmı
+        İlk çağrıda thread'de kurulur ki import süresince event loop kilitlenmesin
+        """
+        if self._client is None:
+            client = await asyncio.get_running_loop().run_in_executor(None, self._build_client)
+            if self._client is None:
+                self._client = client
+        return self._client
+    
+    def _build_client(self) -> "AsyncOpenAI":
+        from openai import AsyncOpenAI
+        return AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            timeout=self.timeout,
+            max_retries=0
+        )
+    
     def _load_templates(self) -> Dict:
         """Hazır komedi şablonları"""
         return {
@@ -45,15 +104,47 @@ class ComedyGenerator:
             ]
         }
     
-    def generate_match_commentary(self, user1_data: Dict, user2_data: Dict, 
-                                  compatibility: Dict) -> Dict:
+    async def generate_match_commentary(self, user1_data: Dict, user2_data: Dict, 
+                                        compatibility: Dict) -> Dict:
         """
         İki kullanıcı için komik eşleşme yorumu üretir
         """
-        score = compatibility["total_score"]
-        
         # AI ile üretilen custom yorum
-        ai_commentary = self._generate_ai_commentary(user1_data, user2_data, compatibility)
+        ai_commentary = await self._generate_ai_commentary(user1_data, user2_data, compatibility)
+        
+        return self._build_match_commentary(user1_data, user2_data, compatibility, ai_commentary)
+    
+    def defer_match_commentary(self, user1_data: Dict, user2_data: Dict,
+                               compatibility: Dict) -> Dict:
+        """
+        LLM'i beklemeden yorum döner
+        Cache'de AI yorumu varsa onu, yoksa template kullanır ve AI üretimini
+        arka plan kuyruğuna atar. Sonuç 'commentary_job' ile sorgulanabilir.
+        """
+        cache_key = self._match_cache_key(user1_data, user2_data, compatibility)
+        job_id = self._job_id(cache_key)
+        
+        main_commentary = self.cache.get(cache_key)
+        if main_commentary is None:
+            main_commentary = self.cache.peek(cache_key)
+            if main_commentary is None:
+                LLM_FALLBACKS.inc(kind="match_deferred")
+                main_commentary = self._fallback_commentary(user1_data, user2_data,
+                                                            compatibility['total_score'])
+            self.queue.submit(
+                job_id,
+                lambda: self._ai_match_commentary(user1_data, user2_data, compatibility)
+            )
+        
+        commentary = self._build_match_commentary(user1_data, user2_data, compatibility,
+                                                  main_commentary)
+        commentary["commentary_job"] = job_id
+        return commentary
+    
+    def _build_match_commentary(self, user1_data: Dict, user2_data: Dict,
+                                compatibility: Dict, main_commentary: Optional[str]) -> Dict:
+        """Yorum sözlüğünü oluşturur"""
+        score = compatibility["total_score"]
         
         # Template-based yorumlar
         template_jokes = self._generate_template_jokes(user1_data, user2_data, score)
@@ -63,55 +154,389 @@ class ComedyGenerator:
         
         return {
             "headline": self._generate_headline(score),
-            "main_commentary": ai_commentary,
+            "main_commentary": main_commentary,
             "bullet_jokes": template_jokes,
             "date_ideas": date_ideas,
             "viral_snippet": self._generate_viral_snippet(user1_data, user2_data, score)
         }
     
-    def _generate_ai_commentary(self, user1: Dict, user2: Dict, compat: Dict) -> str:
+    async def generate_matches_commentary(self, user_data: Dict, matches: List[Dict]) -> List[Dict]:
+        """
+        Tüm eşleşmeler için yorumları tek bir GPT-4 çağrısıyla üretir
+        Sıralama matches listesiyle aynıdır; çıkmayan yorumlar template olur
+        """
+        try:
+            texts = await self._ai_batch_commentary(user_data, matches)
+        except Exception:
+            texts = [None] * len(matches)
+        
+        results = []
+        for match, text in zip(matches, texts):
+            if text is None:
+                LLM_FALLBACKS.inc(kind="match_batch")
+                text = self._fallback_commentary(user_data, match,
+                                                 match['compatibility']['total_score'])
+            results.append(self._build_match_commentary(user_data, match,
+                                                        match['compatibility'], text))
+        return results
+    
+    def defer_matches_commentary(self, user_data: Dict, matches: List[Dict]) -> List[Dict]:
+        """
+        defer_match_commentary'nin toplu hali
+        Cache'de olmayan eşleşmelerin AI yorumları arka planda tek bir
+        batch completion ile üretilir; her eşleşme yine kendi job'u ile sorgulanır
+        """
+        results = []
+        misses = []
+        for match in matches:
+            compatibility = match['compatibility']
+            cache_key = self._match_cache_key(user_data, match, compatibility)
+            job_id = self._job_id(cache_key)
+            
+            main_commentary = self.cache.get(cache_key)
+            if main_commentary is None:
+                main_commentary = self.cache.peek(cache_key)
+                if main_commentary is None:
+                    LLM_FALLBACKS.inc(kind="match_deferred")
+                    main_commentary = self._fallback_commentary(user_data, match,
+                                                                compatibility['total_score'])
+                misses.append((job_id, match))
+            
+            commentary = self._build_match_commentary(user_data, match, compatibility,
+                                                      main_commentary)
+            commentary["commentary_job"] = job_id
+            results.append(commentary)
+        
+        if misses:
+            batch = self._shared_batch(user_data, [match for _, match in misses])
+            for index, (job_id, _) in enumerate(misses):
+                self.queue.submit(job_id, lambda index=index: self._batch_item(batch, index))
+        
+        return results
+    
+    def _shared_batch(self, user_data: Dict,
+                      matches: List[Dict]) -> Callable[[], Awaitable[List[Optional[str]]]]:
+        """
+        Batch completion'ı ilk çağrıda başlatan, sonraki çağrılarda aynı
+        sonucu dönen fonksiyon (kuyruktaki her job aynı çağrıyı bekler)
+        """
+        task: Optional[asyncio.Task] = None
+        
+        async def run() -> List[Optional[str]]:
+            nonlocal task
+            loop = asyncio.get_running_loop()
+            if task is None or task.get_loop() is not loop:
+                task = loop.create_task(self._ai_batch_commentary(user_data, matches))
+            return await asyncio.shield(task)
+        
+        return run
+    
+    @staticmethod
+    async def _batch_item(batch: Callable[[], Awaitable[List[Optional[str]]]], index: int) -> str:
+        texts = await batch()
+        if texts[index] is None:
+            raise ValueError(f"batch commentary missing item {index}")
+        return texts[index]
+    
+    def commentary_status(self, job_id: str) -> Dict:
+        """Arka plan yorum işinin durumu"""
+        status = self.queue.status(job_id)
+        if status["status"] != "ready":
+            # Yeni varyant üretiliyor ya da sonuç kuyruktan düşmüş olabilir;
+            # cache'de hazır bir varyant varsa onu ver
+            cached = self.cache.peek(self._cache_key_from_job(job_id))
+            if cached is not None:
+                return {"job_id": job_id, "status": "ready", "commentary": cached}
+        return status
+    
+    async def _complete(self, system: str, prompt: str, max_tokens: int,
+                        kind: str = "match") -> str:
+        """
+        Tek bir GPT-4 çağrısı - timeout aşılırsa asyncio.TimeoutError fırlatır
+        Aynı normalize prompt ile eşzamanlı çağrılar tek upstream isteği paylaşır
+        """
+        key = self._prompt_key(system, prompt, max_tokens)
+        if key in self.inflight:
+            LLM_COALESCED.inc(kind=kind)
+        return await self.inflight.do(
+            key,
+            lambda: self._complete_upstream(system, prompt, max_tokens, kind)
+        )
+    
+    @staticmethod
+    def _prompt_key(system: str, prompt: str, max_tokens: int) -> str:
+        """Boşluk farklarından bağımsız prompt anahtarı"""
+        normalized = " ".join(system.split()) + "\n" + " ".join(prompt.split())
+        return f"gpt-4:{max_tokens}:" + hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+    
+    async def _complete_upstream(self, system: str, prompt: str, max_tokens: int,
+                                 kind: str) -> str:
+        """
+        Gerçek OpenAI çağrısı (sadece single-flight lideri çalıştırır)
+        Devre açıksa istek atılmadan CircuitOpenError fırlatır
+        """
+        if not self.breaker.allow():
+            LLM_CALLS.inc(kind=kind, outcome="short_circuit")
+            raise CircuitOpenError("OpenAI circuit is open")
+        
+        outcome = "cancelled"
+        started = time.perf_counter()
+        try:
+            with stage("llm"):
+                client = await self._get_client()
+                response = await asyncio.wait_for(
+                    client.chat.completions.create(
+                        model="gpt-4",
+                        messages=[
+                            {"role": "system", "content": system},
+                            {"role": "user", "content": prompt}
+                        ],
+                        max_tokens=max_tokens,
+                        temperature=0.9
+                    ),
+                    timeout=self.timeout
+                )
+            outcome = "ok"
+            return response.choices[0].message.content.strip()
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            raise
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            LLM_CALLS.inc(kind=kind, outcome=outcome)
+            self._record_outcome(outcome, time.perf_counter() - started)
+    
+    def _record_outcome(self, outcome: str, duration: Optional[float]) -> None:
+        """Çağrı sonucunu devre kesiciye bildirir; iptal hata sayılmaz"""
+        if outcome == "ok":
+            self.breaker.record_success(duration)
+        elif outcome == "cancelled":
+            self.breaker.release()
+        else:
+            self.breaker.record_failure()
+    
+    def _match_cache_key(self, user1: Dict, user2: Dict, compat: Dict) -> Tuple:
+        return CommentaryCache.match_key(
+            user1['personality_type'],
+            user2['personality_type'],
+            compat['total_score'],
+            self.score_band
+        )
+    
+    @staticmethod
+    def _job_id(cache_key: Tuple) -> str:
+        """Cache anahtarından URL'de kullanılabilir job id"""
+        return ":".join(str(part) for part in cache_key)
+    
+    @staticmethod
+    def _cache_key_from_job(job_id: str) -> Tuple:
+        parts = job_id.split(":")
+        if parts[0] == "match" and len(parts) == 4 and parts[3].lstrip("-").isdigit():
+            return ("match", parts[1], parts[2], int(parts[3]))
+        return tuple(parts)
+    
+    async def _generate_ai_commentary(self, user1: Dict, user2: Dict, compat: Dict) -> str:
         """OpenAI GPT-4 ile custom komedi üretir"""
+        try:
+            return await self._ai_match_commentary(user1, user2, compat)
+        except Exception as e:
+            # Fallback: template kullan
+            logger.warning("AI match commentary failed, using template: %s", e)
+            LLM_FALLBACKS.inc(kind="match")
+            return self._fallback_commentary(user1, user2, compat['total_score'])
+    
+    async def _ai_match_commentary(self, user1: Dict, user2: Dict, compat: Dict) -> str:
+        """AI yorumu - cache'e bakar, hata durumunda exception fırlatır"""
+        cache_key = self._match_cache_key(user1, user2, compat)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        commentary = await self._complete(
+            MATCH_SYSTEM_PROMPT,
+            self._match_prompt(user1, user2, cache_key),
+            max_tokens=150,
+            kind="match"
+        )
+        self.cache.put(cache_key, commentary)
+        return commentary
+    
+    async def stream_match_commentary(self, user1: Dict, user2: Dict,
+                                      compat: Dict) -> AsyncIterator[str]:
+        """
+        AI yorumunu OpenAI ürettikçe parça parça verir (stream=True)
+        Cache'de varsa tek parça döner. Hiç parça gelmeden hata/timeout olursa
+        template yorum tek parça olarak verilir; yarıda kesilirse akış biter.
+        """
+        cache_key = self._match_cache_key(user1, user2, compat)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+        
+        if not self.breaker.allow():
+            LLM_CALLS.inc(kind="match_stream", outcome="short_circuit")
+            LLM_FALLBACKS.inc(kind="match_stream")
+            yield self._fallback_commentary(user1, user2, compat['total_score'])
+            return
         
+        chunks: List[str] = []
+        outcome = "cancelled"
+        stream = None
+        started = time.perf_counter()
+        first_chunk_after = None
         try:
-            prompt = f"""Sen bir crypto dating komedyenisin. İki Farcaster kullanıcısı için komik bir eşleşme yorumu yaz.
+            client = await self._get_client()
+            stream = await asyncio.wait_for(
+                client.chat.completions.create(
+                    model="gpt-4",
+                    messages=[
+                        {"role": "system", "content": MATCH_SYSTEM_PROMPT},
+                        {"role": "user", "content": self._match_prompt(user1, user2, cache_key)}
+                    ],
+                    max_tokens=150,
+                    temperature=0.9,
+                    stream=True
+                ),
+                timeout=self.timeout
+            )
+            while True:
+                # Her parça için ayrı timeout: akış takılırsa bekleme sınırlı
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), timeout=self.timeout)
+                except StopAsyncIteration:
+                    break
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    if first_chunk_after is None:
+                        first_chunk_after = time.perf_counter() - started
+                    chunks.append(delta)
+                    yield delta
+            outcome = "ok"
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+        except Exception:
+            outcome = "error"
+        finally:
+            LLM_CALLS.inc(kind="match_stream", outcome=outcome)
+            # Stream'de yavaşlık ilk parçaya kadar geçen süreyle ölçülür
+            self._record_outcome(outcome, first_chunk_after)
+            if stream is not None:
+                await stream.response.aclose()
+        
+        if outcome == "ok" and "".join(chunks).strip():
+            self.cache.put(cache_key, "".join(chunks).strip())
+        elif not chunks:
+            LLM_FALLBACKS.inc(kind="match_stream")
+            yield self._fallback_commentary(user1, user2, compat['total_score'])
+    
+    def preview_match_commentary(self, user1_data: Dict, user2_data: Dict,
+                                 compatibility: Dict) -> Dict:
+        """
+        Yorumun LLM'e bağlı olmayan kısımları (başlık, şakalar, date fikirleri)
+        main_commentary None - stream ile sonradan doldurulur
+        """
+        return self._build_match_commentary(user1_data, user2_data, compatibility, None)
+    
+    def _match_prompt(self, user1: Dict, user2: Dict, cache_key: Tuple) -> str:
+        """Eşleşme yorumu prompt'u - kesin skor yerine cache bandı verilir"""
+        band_low = cache_key[3] * self.score_band
+        band_high = band_low + self.score_band - 1
+        
+        return f"""Sen bir crypto dating komedyenisin. İki Farcaster kullanıcısı için komik bir eşleşme yorumu yaz.
 
 Kullanıcı 1: {user1['profile']['name']} - {user1['profile']['description']}
 Kullanıcı 2: {user2['profile']['name']} - {user2['profile']['description']}
 
-Uyumluluk Skoru: {compat['total_score']}%
+Uyumluluk Skoru: %{band_low}-{band_high} arası
 
 Kurallar:
+- Kesin skor yazma, sadece seviyesine göre yorum yap
 - Crypto insider şakaları kullan
 - 2-3 cümle maksimum
 - Emoji ekle
 - Eğlenceli ve paylaşılabilir ol
 - Türkçe yaz
 """
-            
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "Sen eğlenceli bir crypto dating komedyenisin."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=150,
-                temperature=0.9
+    
+    async def _ai_batch_commentary(self, user1: Dict,
+                                   matches: List[Dict]) -> List[Optional[str]]:
+        """
+        Birden çok eşleşme için tek completion - JSON çıktı beklenir
+        Cache'de olanlar prompt'a girmez; geçersiz/eksik öğeler None döner.
+        Completion tamamen başarısız olursa exception fırlatır.
+        """
+        texts: List[Optional[str]] = [None] * len(matches)
+        # Aynı tip çifti + bant için prompt'a tek aday girer
+        pending: Dict[Tuple, Tuple[List[int], Dict]] = {}
+        for index, match in enumerate(matches):
+            cache_key = self._match_cache_key(user1, match, match['compatibility'])
+            if cache_key in pending:
+                pending[cache_key][0].append(index)
+                continue
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                texts[index] = cached
+            else:
+                pending[cache_key] = ([index], match)
+        
+        if not pending:
+            return texts
+        
+        lines = []
+        for number, (cache_key, (_, match)) in enumerate(pending.items(), start=1):
+            band_low = cache_key[3] * self.score_band
+            band_high = band_low + self.score_band - 1
+            lines.append(
+                f"#{number}: {match['profile']['name']} - {match['profile']['description']} "
+                f"(uyum %{band_low}-{band_high} arası)"
             )
-            
-            return response.choices[0].message.content.strip()
         
-        except Exception as e:
-            # Fallback: template kullan
-            return self._fallback_commentary(user1, user2, compat['total_score'])
+        prompt = f"""Sen bir crypto dating komedyenisin. Bir Farcaster kullanıcısı ile adaylarının her biri için ayrı, komik bir eşleşme yorumu yaz.
+
+Kullanıcı: {user1['profile']['name']} - {user1['profile']['description']}
+
+Adaylar:
+{chr(10).join(lines)}
+
+Kurallar:
+- Her aday için 2-3 cümle, kesin skor yazma
+- Crypto insider şakaları kullan, emoji ekle
+- Türkçe yaz
+- SADECE şu formatta JSON döndür: {{"yorumlar": [{{"id": 1, "yorum": "..."}}]}}
+"""
+        
+        content = await self._complete(
+            "Sen eğlenceli bir crypto dating komedyenisin. Sadece geçerli JSON yazarsın.",
+            prompt,
+            max_tokens=min(150 * len(pending), 1500),
+            kind="match_batch"
+        )
+        
+        parsed = _parse_batch_commentary(content, len(pending))
+        for (cache_key, (indexes, _)), text in zip(pending.items(), parsed):
+            if text is not None:
+                self.cache.put(cache_key, text)
+                for index in indexes:
+                    texts[index] = text
+        return texts
     
     def _fallback_commentary(self, user1: Dict, user2: Dict, score: float) -> str:
-        """AI çalışmazsa template yorum"""
+        """
+        AI çalışmazsa template yorum
+        Şablon prompt'u belirleyen cache anahtarından (tip çifti + skor bandı) seçilir:
+        aynı completion'ı bekleyen tüm istekler aynı fallback'i alır
+        """
         templates = [
             f"{user1['profile']['name']} ve {user2['profile']['name']} - %{score} uyum! Crypto'nun en wholesome çifti olabilirsiniz! 💕",
             f"İkiniz de crypto'ya aşıksınız, birbirinize de %{score} aşıksınız! WAGMI together! 🚀",
             f"%{score} uyum... Bu rakamlar yalan söylemez! İkiniz için bullish'im! 📈"
         ]
-        return random.choice(templates)
+        cache_key = self._match_cache_key(user1, user2, {"total_score": score})
+        digest = hashlib.sha1(self._job_id(cache_key).encode("utf-8")).digest()
+        return templates[digest[0] % len(templates)]
     
     def _generate_template_jokes(self, user1: Dict, user2: Dict, score: float) -> List[str]:
         """Template bazlı şakalar"""
@@ -208,12 +633,42 @@ Uyumluluk: %{score}
 Sen de dene! 👇
         """.strip()
     
-    def generate_personality_reveal(self, user_data: Dict) -> str:
+    async def generate_personality_reveal(self, user_data: Dict) -> str:
         """Kişilik açıklama metni"""
+        try:
+            return await self._ai_personality_reveal(user_data)
+        except Exception:
+            LLM_FALLBACKS.inc(kind="reveal")
+            return self._fallback_reveal(user_data['profile'])
+    
+    def defer_personality_reveal(self, user_data: Dict) -> Dict:
+        """
+        LLM'i beklemeden kişilik açıklaması döner
+        AI metni hazır değilse template döner ve üretimi kuyruğa atar
+        """
+        cache_key = CommentaryCache.reveal_key(user_data['personality_type'])
+        job_id = self._job_id(cache_key)
+        
+        text = self.cache.get(cache_key)
+        if text is None:
+            text = self.cache.peek(cache_key)
+            if text is None:
+                LLM_FALLBACKS.inc(kind="reveal_deferred")
+                text = self._fallback_reveal(user_data['profile'])
+            self.queue.submit(job_id, lambda: self._ai_personality_reveal(user_data))
+        
+        return {"text": text, "commentary_job": job_id}
+    
+    async def _ai_personality_reveal(self, user_data: Dict) -> str:
+        """AI kişilik açıklaması - hata durumunda exception fırlatır"""
         profile = user_data['profile']
         
-        try:
-            prompt = f"""Sen bir crypto kişilik analisti ve komedyensin. Bu kişilik için eğlenceli bir açıklama yaz:
+        cache_key = CommentaryCache.reveal_key(user_data['personality_type'])
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        prompt = f"""Sen bir crypto kişilik analisti ve komedyensin. Bu kişilik için eğlenceli bir açıklama yaz:
 
 Kişilik: {profile['name']}
 Açıklama: {profile['description']}
@@ -226,21 +681,19 @@ Kurallar:
 - Emoji kullan
 - Türkçe yaz
 """
-            
-            response = self.client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "Sen crypto komedyenisin."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=200,
-                temperature=0.9
-            )
-            
-            return response.choices[0].message.content.strip()
         
-        except:
-            return f"""
+        reveal = await self._complete(
+            "Sen crypto komedyenisin.",
+            prompt,
+            max_tokens=200,
+            kind="reveal"
+        )
+        self.cache.put(cache_key, reveal)
+        return reveal
+    
+    def _fallback_reveal(self, profile: Dict) -> str:
+        """AI çalışmazsa template kişilik açıklaması"""
+        return f"""
 {profile['name']}
 
 {profile['description']}
@@ -248,4 +701,44 @@ Kurallar:
 {profile['fun_fact']} 😄
 
 {profile['dating_style']}
-            """.strip()
\ No newline at end of file
+        """.strip()
+
+
+_JSON_OBJECT = re.compile(r"\{.*\}", re.DOTALL)
+
+# Tek yorum için makul üst sınır (model talimatı aşarsa çöpe)
+MAX_BATCH_COMMENTARY_CHARS = 600
+
+
+def _parse_batch_commentary(content: str, count: int) -> List[Optional[str]]:
+    """
+    Batch completion çıktısını doğrular
+    {"yorumlar": [{"id": n, "yorum": "..."}]} - id 1'den başlar. Kod bloğu
+    veya etrafında metin olsa da ilk/son süslü parantez arası denenir.
+    Geçersiz, tekrar eden veya eksik öğeler None kalır.
+    """
+    texts: List[Optional[str]] = [None] * count
+    match = _JSON_OBJECT.search(content or "")
+    if match is None:
+        return texts
+    try:
+        payload = json.loads(match.group(0))
+    except ValueError:
+        return texts
+    
+    items = payload.get("yorumlar") if isinstance(payload, dict) else None
+    if not isinstance(items, list):
+        return texts
+    
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        number, text = item.get("id"), item.get("yorum")
+        if not isinstance(number, int) or isinstance(number, bool) or not 1 <= number <= count:
+            continue
+        if not isinstance(text, str):
+            continue
+        text = text.strip()
+        if text and len(text) <= MAX_BATCH_COMMENTARY_CHARS and texts[number - 1] is None:
+            texts[number - 1] = text
+    return texts
@@ -0,0 +1,103 @@
+"""
+Commentary Queue
+LLM yorumlarını frame cevabının dışında, arka planda üreten iş kuyruğu
+"""
+
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+import asyncio
+import logging
+
+from .metrics import detach_request
+
+logger = logging.getLogger(__name__)
+
+JobFactory = Callable[[], Awaitable[str]]
+
+
+class CommentaryQueue:
+    """
+    asyncio tabanlı arka plan kuyruğu
+    Aynı job_id ile gelen işler tekilleştirilir; sonuçlar sınırlı bir
+    LRU içinde tutulur ve /api/commentary/{job_id} üzerinden sorgulanır.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 256, max_results: int = 1024):
+        self.num_workers = workers
+        self.max_pending = max_pending
+        self.max_results = max_results
+        self._pending: "OrderedDict[str, JobFactory]" = OrderedDict()
+        self._results: "OrderedDict[str, Dict]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._workers = []
+
+    def submit(self, job_id: str, factory: JobFactory) -> bool:
+        """
+        İşi kuyruğa ekler
+        Zaten bekleyen/hazır bir iş varsa veya kuyruk doluysa False döner
+        """
+        if job_id in self._pending:
+            return False
+        if len(self._pending) >= self.max_pending:
+            logger.warning("Commentary queue full, dropping job %s", job_id)
+            return False
+
+        self._ensure_workers()
+        self._results.pop(job_id, None)
+        self._pending[job_id] = factory
+        self._queue.put_nowait(job_id)
+        return True
+
+    def status(self, job_id: str) -> Dict:
+        """İşin durumu: pending / ready / failed / unknown"""
+        if job_id in self._pending:
+            return {"job_id": job_id, "status": "pending"}
+        result = self._results.get(job_id)
+        if result is None:
+            return {"job_id": job_id, "status": "unknown"}
+        return {"job_id": job_id, **result}
+
+    def stats(self) -> Dict:
+        return {
+            "pending": len(self._pending),
+            "results": len(self._results),
+            "workers": len(self._workers)
+        }
+
+    def _ensure_workers(self) -> None:
+        """Worker'ları çalışan event loop üzerinde (gerekirse yeniden) başlatır"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._queue is not None:
+            return
+
+        # Loop değiştiyse (ör. test client, reload) bekleyen işleri yeni kuyruğa taşı
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        for job_id in self._pending:
+            self._queue.put_nowait(job_id)
+        self._workers = [loop.create_task(self._worker()) for _ in range(self.num_workers)]
+
+    async def _worker(self) -> None:
+        # Worker'ı başlatan isteğin Server-Timing listesine yazılmasın
+        detach_request()
+        queue = self._queue
+        while True:
+            job_id = await queue.get()
+            factory = self._pending.get(job_id)
+            if factory is None:
+                continue
+            try:
+                commentary = await factory()
+                self._store(job_id, {"status": "ready", "commentary": commentary})
+            except Exception as e:
+                logger.warning("Commentary job %s failed: %s", job_id, e)
+                self._store(job_id, {"status": "failed"})
+            finally:
+                self._pending.pop(job_id, None)
+
+    def _store(self, job_id: str, result: Dict) -> None:
+        self._results[job_id] = result
+        self._results.move_to_end(job_id)
+        while len(self._results) > self.max_results:
+            self._results.popitem(last=False)
@@ -4,17 +4,15 @@ Dynamic frame HTML üretir
 """
 
 from typing import Dict, Optional
+import html
 import os
 
-class FrameBuilder:
-    """Farcaster Frame oluşturucu"""
-    
-    def __init__(self):
-        self.app_url = os.getenv("APP_URL", "https://your-app.vercel.app")
-    
-    def build_initial_frame(self) -> str:
-        """İlk frame: Başlangıç ekranı"""
-        return f"""<!DOCTYPE html>
+from .personality import PERSONALITY_PROFILES
+from .templates import FrameTemplate, StaticAsset
+
+# Şablonlar: {{alan}} yer tutucuları, CSS olduğu gibi (f-string kaçışı yok)
+
+INITIAL_FRAME = """<!DOCTYPE html>
 <html lang="tr">
 <head>
     <meta charset="UTF-8">
@@ -23,18 +21,18 @@ class FrameBuilder:
     
     <!-- Farcaster Frame Meta Tags -->
     <meta property="fc:frame" content="vNext" />
-    <meta property="fc:frame:image" content="{self.app_url}/static/images/start.png" />
+    <meta property="fc:frame:image" content="{{app_url}}/static/images/start.png" />
     <meta property="fc:frame:button:1" content="🔍 Kişiliğimi Keşfet!" />
     <meta property="fc:frame:button:2" content="💕 Kiminle Uyumluyum?" />
-    <meta property="fc:frame:post_url" content="{self.app_url}/api/frame/analyze" />
+    <meta property="fc:frame:post_url" content="{{app_url}}/api/frame/analyze" />
     
     <!-- Open Graph -->
     <meta property="og:title" content="Crypto Compatibility" />
     <meta property="og:description" content="Crypto kişiliğini keşfet, soulmate'ini bul!" />
-    <meta property="og:image" content="{self.app_url}/static/images/start.png" />
+    <meta property="og:image" content="{{app_url}}/static/images/start.png" />
     
     <style>
-        body {{
+        body {
             font-family: 'Inter', sans-serif;
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             display: flex;
@@ -43,19 +41,19 @@ class FrameBuilder:
             min-height: 100vh;
             margin: 0;
             color: white;
-        }}
-        .container {{
+        }
+        .container {
             text-align: center;
             padding: 2rem;
-        }}
-        h1 {{
+        }
+        h1 {
             font-size: 3rem;
             margin-bottom: 1rem;
-        }}
-        p {{
+        }
+        p {
             font-size: 1.2rem;
             opacity: 0.9;
-        }}
+        }
     </style>
 </head>
 <body>
@@ -65,87 +63,78 @@ class FrameBuilder:
     </div>
 </body>
 </html>"""
-    
-    def build_personality_result_frame(self, personality_data: Dict) -> str:
-        """Kişilik sonuç frame'i"""
-        profile = personality_data['profile']
-        
-        return f"""<!DOCTYPE html>
+
+
+PERSONALITY_RESULT_FRAME = """<!DOCTYPE html>
 <html lang="tr">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Kişiliğin: {profile['name']}</title>
+    <title>Kişiliğin: {{name}}</title>
     
     <!-- Farcaster Frame Meta Tags -->
     <meta property="fc:frame" content="vNext" />
-    <meta property="fc:frame:image" content="{self.app_url}/api/generate-image/personality/{personality_data['personality_type']}" />
+    <meta property="fc:frame:image" content="{{app_url}}/api/generate-image/personality/{{personality_type}}" />
     <meta property="fc:frame:button:1" content="💕 Eşleşmeleri Gör" />
     <meta property="fc:frame:button:2" content="🔄 Tekrar Dene" />
     <meta property="fc:frame:button:3" content="📤 Paylaş" />
-    <meta property="fc:frame:post_url" content="{self.app_url}/api/frame/matches" />
+    <meta property="fc:frame:post_url" content="{{app_url}}/api/frame/matches" />
     
     <!-- Open Graph -->
-    <meta property="og:title" content="Ben bir {profile['name']}!" />
-    <meta property="og:description" content="{profile['description']}" />
-    <meta property="og:image" content="{self.app_url}/api/generate-image/personality/{personality_data['personality_type']}" />
+    <meta property="og:title" content="Ben bir {{name}}!" />
+    <meta property="og:description" content="{{description}}" />
+    <meta property="og:image" content="{{app_url}}/api/generate-image/personality/{{personality_type}}" />
+    {{reveal_meta}}
     
     <style>
-        body {{
+        body {
             font-family: 'Inter', sans-serif;
             background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
             padding: 2rem;
             color: white;
-        }}
-        .result {{
+        }
+        .result {
             max-width: 600px;
             margin: 0 auto;
             background: rgba(255,255,255,0.1);
             backdrop-filter: blur(10px);
             padding: 2rem;
             border-radius: 20px;
-        }}
-        h1 {{
+        }
+        h1 {
             font-size: 2.5rem;
             margin-bottom: 1rem;
-        }}
-        .description {{
+        }
+        .description {
             font-size: 1.1rem;
             line-height: 1.6;
             margin: 1rem 0;
-        }}
-        .fun-fact {{
+        }
+        .fun-fact {
             background: rgba(255,255,255,0.2);
             padding: 1rem;
             border-radius: 10px;
             margin-top: 1rem;
-        }}
+        }
     </style>
 </head>
 <body>
     <div class="result">
-        <h1>{profile['name']}</h1>
-        <p class="description">{profile['description']}</p>
+        <h1>{{name}}</h1>
+        <p class="description">{{description}}</p>
         <div class="fun-fact">
-            <strong>Fun Fact:</strong> {profile['fun_fact']}
+            <strong>Fun Fact:</strong> {{fun_fact}}
         </div>
         <div class="fun-fact">
-            <strong>Dating Style:</strong> {profile['dating_style']}
+            <strong>Dating Style:</strong> {{dating_style}}
         </div>
+        {{reveal_block}}
     </div>
 </body>
 </html>"""
-    
-    def build_matches_frame(self, matches: list, user_data: Dict) -> str:
-        """Eşleşme sonuçları frame'i"""
-        
-        if not matches:
-            return self._build_no_matches_frame()
-        
-        top_match = matches[0]
-        score = top_match['compatibility']['total_score']
-        
-        return f"""<!DOCTYPE html>
+
+
+MATCHES_FRAME = """<!DOCTYPE html>
 <html lang="tr">
 <head>
     <meta charset="UTF-8">
@@ -154,83 +143,84 @@ class FrameBuilder:
     
     <!-- Farcaster Frame Meta Tags -->
     <meta property="fc:frame" content="vNext" />
-    <meta property="fc:frame:image" content="{self.app_url}/api/generate-image/match/{user_data['fid']}/{top_match['fid']}" />
+    <meta property="fc:frame:image" content="{{app_url}}/api/generate-image/match/{{user_fid}}/{{match_fid}}?score={{score}}" />
     <meta property="fc:frame:button:1" content="📊 Detaylı Analiz" />
     <meta property="fc:frame:button:2" content="➡️ Sonraki Eşleşme" />
+    <meta property="fc:frame:button:2:action" content="post" />
+    <meta property="fc:frame:button:2:target" content="{{app_url}}/api/frame/next-match" />
     <meta property="fc:frame:button:3" content="📤 Paylaş" />
-    <meta property="fc:frame:post_url" content="{self.app_url}/api/frame/match-detail" />
+    <meta property="fc:frame:post_url" content="{{app_url}}/api/frame/match-detail" />
+    <meta property="fc:frame:state" content="{{state}}" />
     
     <!-- Open Graph -->
-    <meta property="og:title" content="{top_match['username']} ile %{score} uyumluyum!" />
+    <meta property="og:title" content="{{username}} ile %{{score}} uyumluyum!" />
     <meta property="og:description" content="Crypto soulmate'imi buldum! 🚀" />
-    <meta property="og:image" content="{self.app_url}/api/generate-image/match/{user_data['fid']}/{top_match['fid']}" />
+    <meta property="og:image" content="{{app_url}}/api/generate-image/match/{{user_fid}}/{{match_fid}}?score={{score}}" />
     
     <style>
-        body {{
+        body {
             font-family: 'Inter', sans-serif;
             background: linear-gradient(135deg, #fa709a 0%, #fee140 100%);
             padding: 2rem;
             color: #333;
-        }}
-        .match-card {{
+        }
+        .match-card {
             max-width: 600px;
             margin: 0 auto;
             background: white;
             padding: 2rem;
             border-radius: 20px;
             box-shadow: 0 10px 40px rgba(0,0,0,0.2);
-        }}
-        .score {{
+        }
+        .score {
             font-size: 4rem;
             font-weight: bold;
             color: #fa709a;
             text-align: center;
-        }}
-        .match-name {{
+        }
+        .match-name {
             font-size: 2rem;
             text-align: center;
             margin: 1rem 0;
-        }}
-        .compatibility-breakdown {{
+        }
+        .compatibility-breakdown {
             margin: 1.5rem 0;
-        }}
-        .compat-item {{
+        }
+        .compat-item {
             display: flex;
             justify-content: space-between;
             margin: 0.5rem 0;
             padding: 0.5rem;
             background: #f8f9fa;
             border-radius: 8px;
-        }}
+        }
     </style>
 </head>
 <body>
     <div class="match-card">
-        <div class="score">{score}%</div>
-        <div class="match-name">{top_match['username']}</div>
+        <div class="score">{{score}}%</div>
+        <div class="match-name">{{username}}</div>
         <p style="text-align: center; font-size: 1.2rem;">
-            {top_match['profile']['name']}
+            {{match_name}}
         </p>
         <div class="compatibility-breakdown">
             <h3>Uyumluluk Detayları:</h3>
-            {"".join([f'<div class="compat-item"><span>{k}</span><span>{v}%</span></div>' 
-                     for k, v in top_match['compatibility']['breakdown'].items()])}
+            {{breakdown}}
         </div>
     </div>
 </body>
 </html>"""
-    
-    def _build_no_matches_frame(self) -> str:
-        """Eşleşme bulunamadı frame'i"""
-        return f"""<!DOCTYPE html>
+
+
+NO_MATCHES_FRAME = """<!DOCTYPE html>
 <html lang="tr">
 <head>
     <meta charset="UTF-8">
     <title>Henüz Eşleşme Yok</title>
     <meta property="fc:frame" content="vNext" />
-    <meta property="fc:frame:image" content="{self.app_url}/static/images/no-matches.png" />
+    <meta property="fc:frame:image" content="{{app_url}}/static/images/no-matches.png" />
     <meta property="fc:frame:button:1" content="🔄 Tekrar Dene" />
-    <meta property="fc:frame:post_url" content="{self.app_url}/api/frame/analyze" />
+    <meta property="fc:frame:post_url" content="{{app_url}}/api/frame/analyze" />
 </head>
 <body>
     <div style="text-align: center; padding: 3rem;">
@@ -239,22 +229,21 @@ class FrameBuilder:
     </div>
 </body>
 </html>"""
-    
-    def build_share_frame(self, share_data: Dict) -> str:
-        """Paylaşım frame'i"""
-        return f"""<!DOCTYPE html>
+
+
+SHARE_FRAME = """<!DOCTYPE html>
 <html lang="tr">
 <head>
     <meta charset="UTF-8">
     <title>Sonuçlarımı Paylaşıyorum!</title>
     
     <meta property="fc:frame" content="vNext" />
-    <meta property="fc:frame:image" content="{self.app_url}/api/generate-image/share/{share_data['fid']}" />
+    <meta property="fc:frame:image" content="{{app_url}}/api/generate-image/share/{{fid}}" />
     <meta property="fc:frame:button:1" content="🔍 Ben de Dene" />
-    <meta property="fc:frame:post_url" content="{self.app_url}/api/frame/start" />
+    <meta property="fc:frame:post_url" content="{{app_url}}/api/frame/start" />
     
-    <meta property="og:title" content="{share_data['text']}" />
-    <meta property="og:image" content="{self.app_url}/api/generate-image/share/{share_data['fid']}" />
+    <meta property="og:title" content="{{text}}" />
+    <meta property="og:image" content="{{app_url}}/api/generate-image/share/{{fid}}" />
 </head>
 <body>
     <div style="text-align: center; padding: 2rem;">
@@ -262,4 +251,103 @@ class FrameBuilder:
         <p>Arkadaşların da deneyebilir!</p>
     </div>
 </body>
-</html>"""
\ No newline at end of file
+</html>"""
+
+
+class FrameBuilder:
+    """Farcaster Frame oluşturucu"""
+    
+    def __init__(self):
+        self.app_url = os.getenv("APP_URL", "https://your-app.vercel.app")
+        
+        # Statik kısımlar bir kez derlenir, app_url gömülür
+        self._personality_template = FrameTemplate(PERSONALITY_RESULT_FRAME, app_url=self.app_url)
+        # Sonuç frame'i tipe bağlı: her tip için profil alanları gömülü şablon
+        self._personality_templates = {
+            personality_type: FrameTemplate(
+                PERSONALITY_RESULT_FRAME,
+                app_url=self.app_url,
+                personality_type=personality_type,
+                **self._profile_fields(profile)
+            )
+            for personality_type, profile in PERSONALITY_PROFILES.items()
+        }
+        self._matches_template = FrameTemplate(MATCHES_FRAME, app_url=self.app_url)
+        self._share_template = FrameTemplate(SHARE_FRAME, app_url=self.app_url)
+        
+        # Tamamen statik frame'ler: hazır byte + gzip/brotli + ETag
+        self.initial_frame = StaticAsset(FrameTemplate(INITIAL_FRAME, app_url=self.app_url).render())
+        self.no_matches_frame = StaticAsset(FrameTemplate(NO_MATCHES_FRAME, app_url=self.app_url).render())
+    
+    def build_initial_frame(self) -> str:
+        """İlk frame: Başlangıç ekranı"""
+        return self.initial_frame.text
+    
+    def build_personality_result_frame(self, personality_data: Dict,
+                                       reveal: Optional[Dict] = None) -> str:
+        """
+        Kişilik sonuç frame'i
+        reveal: ComedyGenerator.defer_personality_reveal çıktısı (opsiyonel)
+        """
+        profile = personality_data['profile']
+        reveal_meta = ""
+        reveal_block = ""
+        if reveal:
+            # LLM çıktısı güvenilmez metin: markup olarak yorumlanmasın
+            reveal_meta = f'<meta name="commentary:url" content="{self.app_url}/api/commentary/{html.escape(reveal["commentary_job"])}" />'
+            reveal_block = f'<div class="fun-fact">{html.escape(reveal["text"])}</div>'
+        
+        personality_type = personality_data['personality_type']
+        if profile is PERSONALITY_PROFILES.get(personality_type):
+            return self._personality_templates[personality_type].render(
+                reveal_meta=reveal_meta,
+                reveal_block=reveal_block
+            )
+        
+        return self._personality_template.render(
+            personality_type=personality_type,
+            reveal_meta=reveal_meta,
+            reveal_block=reveal_block,
+            **self._profile_fields(profile)
+        )
+    
+    @staticmethod
+    def _profile_fields(profile: Dict) -> Dict:
+        return {
+            "name": profile['name'],
+            "description": profile['description'],
+            "fun_fact": profile['fun_fact'],
+            "dating_style": profile['dating_style']
+        }
+    
+    def build_matches_frame(self, matches: list, user_data: Dict,
+                            position: int = 0, state: str = "") -> str:
+        """
+        Eşleşme sonuçları frame'i
+        position: gösterilecek eşleşmenin sırası, state: sonraki tık için cursor
+        """
+        
+        if not matches:
+            return self._build_no_matches_frame()
+        
+        top_match = matches[position]
+        
+        return self._matches_template.render(
+            user_fid=user_data['fid'],
+            state=state,
+            match_fid=top_match['fid'],
+            score=top_match['compatibility']['total_score'],
+            # Farcaster API'den gelen username güvenilmez metin
+            username=html.escape(top_match['username']),
+            match_name=top_match['profile']['name'],
+            breakdown="".join([f'<div class="compat-item"><span>{k}</span><span>{v}%</span></div>' 
+                               for k, v in top_match['compatibility']['breakdown'].items()])
+        )
+    
+    def _build_no_matches_frame(self) -> str:
+        """Eşleşme bulunamadı frame'i"""
+        return self.no_matches_frame.text
+    
+    def build_share_frame(self, share_data: Dict) -> str:
+        """Paylaşım frame'i"""
+        return self._share_template.render(fid=share_data['fid'], text=share_data['text'])
@@ -0,0 +1,189 @@
+"""
+Frame Image Renderer
+Pillow ile frame görselleri (PNG) üretir ve cache'ler
+"""
+
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+import hashlib
+import io
+import os
+import textwrap
+import threading
+
+from PIL import Image, ImageDraw, ImageFont
+
+from .metrics import CACHE_LOOKUPS
+from .personality import PERSONALITY_PROFILES
+
+# Farcaster frame oranı 1.91:1
+WIDTH, HEIGHT = 1146, 600
+
+FONT_CANDIDATES = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans-Bold.ttf",
+    "/Library/Fonts/Arial Bold.ttf",
+]
+
+TYPE_COLORS: Dict[str, Tuple[Tuple[int, int, int], Tuple[int, int, int]]] = {
+    "bitcoin_maxi": ((247, 147, 26), (120, 60, 10)),
+    "defi_degen": ((255, 0, 122), (80, 20, 120)),
+    "nft_connoisseur": ((240, 147, 251), (245, 87, 108)),
+    "shitcoin_surfer": ((0, 200, 180), (20, 60, 140)),
+    "crypto_boomer": ((90, 110, 140), (30, 40, 60)),
+    "eth_enthusiast": ((98, 126, 234), (40, 40, 110)),
+    "meme_lord": ((250, 200, 50), (200, 90, 20)),
+    "dao_architect": ((102, 126, 234), (118, 75, 162)),
+    "whale_watcher": ((30, 144, 255), (10, 40, 90)),
+    "privacy_maximalist": ((60, 60, 60), (10, 10, 10)),
+}
+DEFAULT_COLORS = ((250, 112, 154), (254, 225, 64))
+
+
+class RenderedImage(NamedTuple):
+    body: bytes
+    etag: str
+
+
+def _clean(text: str) -> str:
+    """Fontta olmayan emoji/sembolleri atar"""
+    return "".join(ch for ch in text if ord(ch) < 0x2000).strip()
+
+
+class FrameImageRenderer:
+    """
+    Kişilik kartları başlangıçta bir kez çizilir (sadece 10 tip var)
+    Eşleşme görselleri (tip çifti, skor) anahtarıyla LRU'da tutulur
+    """
+
+    def __init__(self, match_cache_size: int = 512, font_path: Optional[str] = None):
+        self.match_cache_size = match_cache_size
+        self.font_path = font_path or os.getenv("FRAME_FONT_PATH") or self._find_font()
+        self._fonts: Dict[int, ImageFont.ImageFont] = {}
+        self._personality: Dict[str, RenderedImage] = {}
+        self._matches: "OrderedDict[Tuple, RenderedImage]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def prerender_personalities(self) -> None:
+        for personality_type in PERSONALITY_PROFILES:
+            self.personality_image(personality_type)
+
+    def personality_image(self, personality_type: str) -> Optional[RenderedImage]:
+        """Kişilik kartı; bilinmeyen tip için None"""
+        image = self._personality.get(personality_type)
+        if image is None:
+            profile = PERSONALITY_PROFILES.get(personality_type)
+            if profile is None:
+                return None
+            image = self._encode(self._draw_personality(personality_type, profile))
+            self._personality[personality_type] = image
+        return image
+
+    def match_image(self, type1: str, type2: str, score: float) -> RenderedImage:
+        """
+        Eşleşme görseli - (tip çifti, skor) başına bir kez çizilir
+        Skor 0-100'e sıkıştırılıp tam sayıya yuvarlanır: anahtar uzayı tip çifti
+        başına 101 değerle sınırlı kalır (keyfi score parametresi LRU'yu boşaltamaz)
+        """
+        score = 0.0 if score != score else max(0.0, min(100.0, score))
+        key = (type1, type2, int(round(score)))
+        with self._lock:
+            image = self._matches.get(key)
+            if image is not None:
+                self._matches.move_to_end(key)
+                CACHE_LOOKUPS.inc(cache="match_image", result="hit")
+                return image
+        CACHE_LOOKUPS.inc(cache="match_image", result="miss")
+
+        image = self._encode(self._draw_match(type1, type2, key[2]))
+        with self._lock:
+            self._matches[key] = image
+            while len(self._matches) > self.match_cache_size:
+                self._matches.popitem(last=False)
+        return image
+
+    def stats(self) -> Dict:
+        return {"personality_cards": len(self._personality), "match_images": len(self._matches)}
+
+    # ============== ÇİZİM ==============
+
+    def _draw_personality(self, personality_type: str, profile: Dict) -> Image.Image:
+        colors = TYPE_COLORS.get(personality_type, DEFAULT_COLORS)
+        image = self._background(colors)
+        draw = ImageDraw.Draw(image)
+
+        draw.text((60, 50), "CRYPTO COMPATIBILITY", font=self._font(28), fill=(255, 255, 255))
+        draw.text((60, 110), _clean(profile["name"]), font=self._font(72), fill=(255, 255, 255))
+
+        description = textwrap.fill(_clean(profile["description"]), width=52)
+        draw.multiline_text((60, 220), description, font=self._font(32),
+                            fill=(255, 255, 255), spacing=10)
+
+        traits = "  ·  ".join(trait.replace("_", " ") for trait in profile["traits"])
+        draw.text((60, 400), _clean(traits), font=self._font(28), fill=(255, 255, 255))
+
+        # Risk barı
+        risk = profile["risk_tolerance"]
+        draw.text((60, 470), f"Risk: %{risk}", font=self._font(28), fill=(255, 255, 255))
+        track = tuple(c // 2 for c in colors[1])
+        draw.rounded_rectangle((260, 472, 1086, 502), radius=15, fill=track)
+        draw.rounded_rectangle((260, 472, 260 + int(826 * risk / 100), 502), radius=15,
+                               fill=(255, 255, 255))
+        return image
+
+    def _draw_match(self, type1: str, type2: str, score: float) -> Image.Image:
+        image = self._background(DEFAULT_COLORS)
+        draw = ImageDraw.Draw(image)
+
+        name1 = _clean(PERSONALITY_PROFILES.get(type1, {}).get("name", type1))
+        name2 = _clean(PERSONALITY_PROFILES.get(type2, {}).get("name", type2))
+
+        self._centered(draw, 60, "CRYPTO COMPATIBILITY", self._font(28), (51, 51, 51))
+        self._centered(draw, 140, f"%{score}", self._font(150), (255, 255, 255))
+        self._centered(draw, 360, name1, self._font(44), (51, 51, 51))
+        self._centered(draw, 420, "+", self._font(44), (51, 51, 51))
+        self._centered(draw, 480, name2, self._font(44), (51, 51, 51))
+        return image
+
+    def _background(self, colors) -> Image.Image:
+        """Dikey gradient arka plan"""
+        top, bottom = colors
+        gradient = Image.new("RGB", (1, HEIGHT))
+        for y in range(HEIGHT):
+            ratio = y / (HEIGHT - 1)
+            gradient.putpixel((0, y), tuple(
+                int(top[i] + (bottom[i] - top[i]) * ratio) for i in range(3)
+            ))
+        return gradient.resize((WIDTH, HEIGHT))
+
+    def _centered(self, draw: ImageDraw.ImageDraw, y: int, text: str, font, fill) -> None:
+        width = draw.textlength(text, font=font)
+        draw.text(((WIDTH - width) / 2, y), text, font=font, fill=fill)
+
+    def _font(self, size: int):
+        font = self._fonts.get(size)
+        if font is None:
+            if self.font_path:
+                font = ImageFont.truetype(self.font_path, size)
+            else:
+                try:
+                    font = ImageFont.load_default(size=size)
+                except TypeError:
+                    # Pillow < 10.1: sadece bitmap font
+                    font = ImageFont.load_default()
+            self._fonts[size] = font
+        return font
+
+    @staticmethod
+    def _find_font() -> Optional[str]:
+        for path in FONT_CANDIDATES:
+            if os.path.exists(path):
+                return path
+        return None
+
+    @staticmethod
+    def _encode(image: Image.Image) -> RenderedImage:
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG", optimize=True)
+        body = buffer.getvalue()
+        return RenderedImage(body, '"%s"' % hashlib.sha1(body).hexdigest()[:16])
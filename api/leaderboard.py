@@ -0,0 +1,200 @@
+"""
+Leaderboard
+Hesaplanan her uyumluluğu besleyen sınırlı top-K liderlik tablosu
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+import heapq
+import os
+import threading
+
+WINDOWS = ("all", "daily", "weekly")
+
+Pair = Tuple[int, int]
+
+
+def pair_key(fid1: int, fid2: int) -> Pair:
+    """Simetrik çiftler tek anahtar: (a, b) == (b, a)"""
+    return (fid1, fid2) if fid1 <= fid2 else (fid2, fid1)
+
+
+def window_bucket(window: str, now: Optional[datetime] = None) -> str:
+    """Zaman penceresinin o anki dilimi (UTC)"""
+    now = now or datetime.now(timezone.utc)
+    if window == "daily":
+        return now.strftime("%Y-%m-%d")
+    if window == "weekly":
+        year, week, _ = now.isocalendar()
+        return f"{year}-W{week:02d}"
+    return "all"
+
+
+class TopK:
+    """
+    Min-heap + üyelik dict'i
+    Güncelleme O(log K); eski heap kayıtları lazy olarak atlanır
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.members: Dict[Pair, float] = {}
+        self._heap: List[Tuple[float, Pair]] = []
+
+    def threshold(self) -> float:
+        """Tabloya girmek için geçilmesi gereken skor"""
+        if len(self.members) < self.k:
+            return float("-inf")
+        return self._peek()[0]
+
+    def offer(self, pair: Pair, score: float) -> bool:
+        current = self.members.get(pair)
+        if current is not None:
+            if score <= current:
+                return False
+        elif len(self.members) >= self.k:
+            lowest_score, lowest_pair = self._peek()
+            if score <= lowest_score:
+                return False
+            heapq.heappop(self._heap)
+            del self.members[lowest_pair]
+
+        self.members[pair] = score
+        heapq.heappush(self._heap, (score, pair))
+        if len(self._heap) > 2 * self.k:
+            self._compact()
+        return True
+
+    def items(self) -> List[Tuple[Pair, float]]:
+        return sorted(self.members.items(), key=lambda item: item[1], reverse=True)
+
+    def _peek(self) -> Tuple[float, Pair]:
+        # Güncellenmiş çiftlerin eski kayıtlarını at
+        while self.members.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0]
+
+    def _compact(self) -> None:
+        self._heap = [(score, pair) for pair, score in self.members.items()]
+        heapq.heapify(self._heap)
+
+
+class Leaderboard:
+    """Process içi leaderboard: her zaman penceresi için ayrı TopK"""
+
+    def __init__(self, k: int = 50, windows: Iterable[str] = WINDOWS):
+        self.k = k
+        self.windows = tuple(windows)
+        self._lock = threading.Lock()
+        self._tables: Dict[str, Tuple[str, TopK]] = {}
+
+    def record(self, fid1: int, fid2: int, score: float) -> None:
+        self.record_many(fid1, [fid2], [score])
+
+    def record_many(self, user_fid: int, fids: Iterable[int], scores: Iterable[float]) -> None:
+        """Bir kullanıcının birçok adayla skorlarını ekler"""
+        with self._lock:
+            tables = [self._table(window) for window in self.windows]
+            for fid, score in zip(fids, scores):
+                fid, score = int(fid), round(float(score), 1)
+                if fid == user_fid:
+                    continue
+                pair = pair_key(user_fid, fid)
+                for table in tables:
+                    if score > table.threshold() or pair in table.members:
+                        table.offer(pair, score)
+
+    def top(self, window: str = "all", limit: Optional[int] = None) -> List[Dict]:
+        limit = _check_limit(limit, self.k)
+        with self._lock:
+            items = self._table(window).items()
+        return _format(items[:limit])
+
+    def _table(self, window: str) -> TopK:
+        if window not in self.windows:
+            raise ValueError(f"Unknown leaderboard window: {window}")
+        bucket = window_bucket(window)
+        current = self._tables.get(window)
+        if current is None or current[0] != bucket:
+            # Yeni gün/hafta: pencere sıfırdan başlar
+            current = (bucket, TopK(self.k))
+            self._tables[window] = current
+        return current[1]
+
+
+class RedisLeaderboard:
+    """
+    Redis sorted set leaderboard (instance'lar arası paylaşımlı)
+    ZADD GT ile aynı çiftin sadece daha yüksek skoru yazılır, set K ile kırpılır
+    """
+
+    def __init__(self, url: str, k: int = 50, windows: Iterable[str] = WINDOWS,
+                 prefix: str = "crypto_compat:leaderboard"):
+        import redis
+
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self.k = k
+        self.windows = tuple(windows)
+        self.prefix = prefix
+
+    def record(self, fid1: int, fid2: int, score: float) -> None:
+        self.record_many(fid1, [fid2], [score])
+
+    def record_many(self, user_fid: int, fids: Iterable[int], scores: Iterable[float]) -> None:
+        members = {}
+        for fid, score in zip(fids, scores):
+            fid = int(fid)
+            if fid == user_fid:
+                continue
+            member = "%d:%d" % pair_key(user_fid, fid)
+            members[member] = max(members.get(member, 0.0), round(float(score), 1))
+        if not members:
+            return
+
+        # K'dan aşağıdakiler zaten tabloya giremez
+        best = dict(sorted(members.items(), key=lambda item: item[1], reverse=True)[:self.k])
+        pipe = self._redis.pipeline()
+        for window in self.windows:
+            key = self._key(window)
+            pipe.zadd(key, best, gt=True)
+            pipe.zremrangebyrank(key, 0, -(self.k + 1))
+            if window != "all":
+                pipe.expire(key, 8 * 24 * 3600)
+        pipe.execute()
+
+    def top(self, window: str = "all", limit: Optional[int] = None) -> List[Dict]:
+        if window not in self.windows:
+            raise ValueError(f"Unknown leaderboard window: {window}")
+        end = _check_limit(limit, self.k) - 1
+        rows = self._redis.zrevrange(self._key(window), 0, end, withscores=True)
+        items = [(tuple(int(part) for part in member.split(":")), score) for member, score in rows]
+        return _format(items)
+
+    def _key(self, window: str) -> str:
+        return f"{self.prefix}:{window}:{window_bucket(window)}"
+
+
+def _check_limit(limit: Optional[int], k: int) -> int:
+    """None -> k; 1..k dışı limit ValueError (0/negatif dilim boş veya yanlış sonuç verirdi)"""
+    if limit is None:
+        return k
+    if not 1 <= limit <= k:
+        raise ValueError(f"limit must be between 1 and {k}")
+    return limit
+
+
+def _format(items: List[Tuple[Pair, float]]) -> List[Dict]:
+    return [
+        {"user1": f"@user{fid1}", "user2": f"@user{fid2}", "fid1": fid1, "fid2": fid2,
+         "score": score}
+        for (fid1, fid2), score in items
+    ]
+
+
+def create_leaderboard(url: Optional[str] = None, k: Optional[int] = None):
+    """LEADERBOARD_URL redis:// ise Redis, değilse process içi leaderboard"""
+    url = url if url is not None else os.getenv("LEADERBOARD_URL", "")
+    k = k or int(os.getenv("LEADERBOARD_SIZE", "50"))
+    if url.startswith(("redis://", "rediss://")):
+        return RedisLeaderboard(url, k=k)
+    return Leaderboard(k=k)
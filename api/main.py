@@ -4,20 +4,35 @@ Farcaster Mini App için ana uygulama
 """
 
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import (HTMLResponse, JSONResponse, PlainTextResponse, Response,
+                               StreamingResponse)
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 import os
+import asyncio
+import json
+import logging
+import time
+from typing import AsyncIterator, Dict, Optional
 from dotenv import load_dotenv
 
 from .personality import PersonalityAnalyzer
 from .comedy_generator import ComedyGenerator
 from .matching import MatchmakerAI
 from .frame_builder import FrameBuilder
+from .image_renderer import FrameImageRenderer, RenderedImage
+from .templates import StaticAsset, etag_matches
+from .match_cursor import CursorCodec, MatchCursor, MatchSessions
+from .user_resolver import create_user_resolver
+from .metrics import (REGISTRY, REQUEST_DURATION, ERRORS, stage, start_request,
+                      server_timing_header)
 
 # Ortam değişkenlerini yükle
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # FastAPI uygulaması
 app = FastAPI(
     title="Crypto Compatibility",
@@ -34,28 +49,91 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def timing_middleware(request: Request, call_next):
+    """İstek süresi histogramı + aşama süreleri için Server-Timing başlığı"""
+    timings = start_request()
+    started = time.perf_counter()
+    response = await call_next(request)
+    total = time.perf_counter() - started
+    
+    route = request.scope.get("route")
+    REQUEST_DURATION.observe(total, route=getattr(route, "path", "unmatched"),
+                             method=request.method)
+    response.headers["Server-Timing"] = server_timing_header(timings, total)
+    return response
+
+
 # Static files
 # app.mount("/static", StaticFiles(directory="static"), name="static")
 
 # Componentleri initialize et
 personality_analyzer = PersonalityAnalyzer()
 comedy_generator = ComedyGenerator()
-matchmaker = MatchmakerAI()
+matchmaker = MatchmakerAI(personality_analyzer)
 frame_builder = FrameBuilder()
+# "Sonraki Eşleşme": sıralı liste oturumda, imzalı cursor frame state'te
+cursor_codec = CursorCodec()
+match_sessions = MatchSessions(ttl=float(os.getenv("MATCH_SESSION_TTL", "1800")))
+MATCH_PAGE_SIZE = int(os.getenv("MATCH_PAGE_SIZE", "10"))
+# Gerçek username/avatar: sayfa başına tek bulk istek (yapılandırılmamışsa None)
+user_resolver = create_user_resolver()
+image_renderer = FrameImageRenderer()
+
+# Görseller için cache süreleri (Farcaster image proxy + CDN)
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+MATCH_IMAGE_CACHE = "public, max-age=86400"
+STATIC_FRAME_CACHE = "public, max-age=300"
+
+
+@app.on_event("startup")
+async def prerender_images():
+    """
+    10 kişilik kartını arka planda çiz - startup (cold start) bekletilmez
+    PRERENDER_IMAGES=0 ise kartlar ilk istekte çizilir
+    """
+    if os.getenv("PRERENDER_IMAGES", "1") != "0":
+        asyncio.get_running_loop().run_in_executor(None, image_renderer.prerender_personalities)
+
+
+@app.on_event("shutdown")
+async def close_clients():
+    if user_resolver is not None:
+        await user_resolver.aclose()
+
+
+async def _resolve_users(matches: list) -> None:
+    """Eşleşmelerin Farcaster kullanıcı bilgileri (tüm sayfa için tek tur)"""
+    if user_resolver is not None and matches:
+        with stage("users"):
+            await user_resolver.apply(matches)
 
 
 # ============== ANA ENDPOINTS ==============
 
 @app.get("/", response_class=HTMLResponse)
-async def root():
-    """Ana sayfa / İlk frame"""
-    return frame_builder.build_initial_frame()
+async def root(request: Request):
+    """Ana sayfa / İlk frame (hazır sıkıştırılmış byte, ETag/304)"""
+    return _static_frame_response(frame_builder.initial_frame, request)
 
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "version": "1.0.0"}
+    return {
+        "status": "healthy",
+        "version": "1.0.0",
+        "commentary_cache": comedy_generator.cache.stats(),
+        "commentary_queue": comedy_generator.queue.stats(),
+        "llm_circuit": comedy_generator.breaker.stats(),
+        "farcaster_users": user_resolver.stats() if user_resolver is not None else None
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrikleri"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 
 @app.post("/api/frame/analyze")
@@ -67,21 +145,25 @@ async def analyze_personality(request: Request):
     try:
         # Farcaster frame verisini al
         data = await request.json()
-        fid = data.get("untrustedData", {}).get("fid", 12345)  # Demo FID
+        fid = _frame_fid(data.get("untrustedData", {}))
         
         # Kişilik analizi yap
-        personality_data = personality_analyzer.analyze_from_fid(fid)
+        with stage("analyzer"):
+            personality_data = personality_analyzer.analyze_from_fid(fid)
         
-        # Komedi üret
-        commentary = comedy_generator.generate_personality_reveal(personality_data)
+        # Komedi: template hemen, AI metni arka planda
+        with stage("comedy"):
+            reveal = comedy_generator.defer_personality_reveal(personality_data)
         
         # Sonuç frame'i oluştur
-        result_frame = frame_builder.build_personality_result_frame(personality_data)
+        with stage("frame"):
+            result_frame = frame_builder.build_personality_result_frame(personality_data, reveal)
         
         return HTMLResponse(content=result_frame)
     
-    except Exception as e:
-        print(f"Error in analyze: {e}")
+    except Exception:
+        ERRORS.inc(endpoint="analyze")
+        logger.exception("Error in analyze")
         return HTMLResponse(content=frame_builder.build_initial_frame())
 
 
@@ -92,53 +174,140 @@ async def find_matches(request: Request):
     """
     try:
         data = await request.json()
-        fid = data.get("untrustedData", {}).get("fid", 12345)
+        fid = _frame_fid(data.get("untrustedData", {}))
         
         # Kullanıcı verisini al
-        user_data = personality_analyzer.analyze_from_fid(fid)
+        with stage("analyzer"):
+            user_data = personality_analyzer.analyze_from_fid(fid)
         
-        # Eşleşmeleri bul
-        matches = matchmaker.find_matches(fid, num_matches=3)
+        # Eşleşmeleri bul (sayfalama için bir sayfa dolusu sıralı liste)
+        with stage("matchmaker"):
+            matches = matchmaker.find_matches(fid, num_matches=MATCH_PAGE_SIZE)
+        await _resolve_users(matches)
         
-        # Her eşleşme için komedi üret
-        for match in matches:
-            match['comedy'] = comedy_generator.generate_match_commentary(
-                user_data,
-                match,
-                match['compatibility']
-            )
+        # Komedi: LLM beklenmez, hazır olmayanlar template + tek batch arka plan işi
+        with stage("comedy"):
+            comedies = comedy_generator.defer_matches_commentary(user_data, matches[:3])
+            for match, comedy in zip(matches, comedies):
+                match['comedy'] = comedy
         
         # Eşleşme frame'i oluştur
-        matches_frame = frame_builder.build_matches_frame(matches, user_data)
+        with stage("frame"):
+            matches_frame = _match_page(user_data, matches, match_sessions.create(fid, matches), 0)
         
         return HTMLResponse(content=matches_frame)
     
-    except Exception as e:
-        print(f"Error in matches: {e}")
+    except Exception:
+        ERRORS.inc(endpoint="matches")
+        logger.exception("Error in matches")
         return HTMLResponse(content=frame_builder._build_no_matches_frame())
 
 
+@app.post("/api/frame/next-match")
+async def next_match(request: Request):
+    """
+    Sıralı listedeki bir sonraki eşleşme
+    Cursor geçerliyse listeden tek eleman okunur; oturum düşmüşse liste bir kez
+    yeniden hesaplanır. Cursor yok/bozuksa ilk sayfaya döner. Liste sonunda başa sarar.
+    """
+    try:
+        data = await request.json()
+        untrusted = data.get("untrustedData", {})
+        fid = _frame_fid(untrusted)
+        cursor = cursor_codec.decode(untrusted.get("state"))
+        if cursor is None or cursor.fid != fid:
+            return await find_matches(request)
+        
+        with stage("analyzer"):
+            user_data = personality_analyzer.analyze_from_fid(fid)
+        
+        with stage("matchmaker"):
+            list_id = cursor.list_id
+            matches = match_sessions.get(list_id, fid)
+            if matches is None:
+                matches = matchmaker.find_matches(fid, num_matches=MATCH_PAGE_SIZE)
+                list_id = match_sessions.create(fid, matches)
+        await _resolve_users(matches)
+        if not matches:
+            return HTMLResponse(content=frame_builder._build_no_matches_frame())
+        
+        position = (cursor.position + 1) % len(matches)
+        match = matches[position]
+        with stage("comedy"):
+            if 'comedy' not in match:
+                match['comedy'] = comedy_generator.defer_match_commentary(
+                    user_data, match, match['compatibility']
+                )
+        
+        with stage("frame"):
+            return HTMLResponse(content=_match_page(user_data, matches, list_id, position))
+    
+    except Exception:
+        ERRORS.inc(endpoint="next_match")
+        logger.exception("Error in next-match")
+        return HTMLResponse(content=frame_builder._build_no_matches_frame())
+
+
+def _frame_fid(untrusted: Dict) -> int:
+    """
+    Frame verisindeki FID (yoksa demo FID); client "123" gibi string de
+    gönderebilir. Sayı olmayan veya int64 dışı değer ValueError
+    """
+    fid = int(untrusted.get("fid", 12345))
+    if not 0 <= fid < 2 ** 63:
+        raise ValueError(f"fid out of range: {fid}")
+    return fid
+
+
+def _match_page(user_data: Dict, matches: list, list_id: int, position: int) -> str:
+    """Eşleşme frame'i + sonraki tık için imzalı cursor"""
+    state = cursor_codec.encode(MatchCursor(user_data['fid'], list_id, position))
+    return frame_builder.build_matches_frame(matches, user_data, position, state or "")
+
+
+def _cursor_match_fid(untrusted: Dict) -> Optional[int]:
+    """Frame state'teki cursor'ın gösterdiği eşleşme (Detaylı Analiz butonu)"""
+    cursor = cursor_codec.decode(untrusted.get("state"))
+    if cursor is None or cursor.fid != _frame_fid(untrusted):
+        return None
+    matches = match_sessions.get(cursor.list_id, cursor.fid)
+    if not matches or cursor.position >= len(matches):
+        return None
+    return matches[cursor.position]['fid']
+
+
 @app.post("/api/frame/match-detail")
-async def match_detail(request: Request):
-    """Detaylı eşleşme raporu"""
+async def match_detail(request: Request, stream: bool = False):
+    """
+    Detaylı eşleşme raporu
+    stream=true veya Accept: text/event-stream ise SSE olarak akar
+    """
     try:
         data = await request.json()
-        user_fid = data.get("untrustedData", {}).get("fid", 12345)
-        match_fid = data.get("match_fid", 67890)
+        untrusted = data.get("untrustedData", {})
+        user_fid = _frame_fid(untrusted)
+        match_fid = data.get("match_fid") or _cursor_match_fid(untrusted) or 67890
         
         # Detaylı rapor al
-        report = matchmaker.get_detailed_match_report(user_fid, match_fid)
+        with stage("matchmaker"):
+            report = matchmaker.get_detailed_match_report(user_fid, match_fid)
+        
+        if _wants_stream(request, stream):
+            return _stream_report(report)
         
         # Komedi ekle
-        report['comedy'] = comedy_generator.generate_match_commentary(
-            report['user1'],
-            report['user2'],
-            report['compatibility']
-        )
+        with stage("comedy"):
+            report['comedy'] = await comedy_generator.generate_match_commentary(
+                report['user1'],
+                report['user2'],
+                report['compatibility']
+            )
         
         return JSONResponse(content=report)
     
     except Exception as e:
+        ERRORS.inc(endpoint="match_detail")
+        logger.exception("Error in match-detail")
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -146,59 +315,156 @@ async def match_detail(request: Request):
 async def get_personality(fid: int):
     """Kullanıcı kişiliğini al (API endpoint)"""
     try:
-        personality = personality_analyzer.analyze_from_fid(fid)
-        return JSONResponse(content=personality)
+        with stage("analyzer"):
+            payload = personality_analyzer.analysis_payload(fid)
+        return Response(content=payload, media_type="application/json")
     except Exception as e:
+        ERRORS.inc(endpoint="personality")
+        logger.exception("Error in personality")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/compatibility/{fid1}/{fid2}")
-async def calculate_compatibility(fid1: int, fid2: int):
-    """İki kullanıcı arasında uyumluluk hesapla"""
+async def calculate_compatibility(fid1: int, fid2: int, request: Request, stream: bool = False):
+    """
+    İki kullanıcı arasında uyumluluk hesapla
+    stream=true veya Accept: text/event-stream ise SSE olarak akar
+    """
     try:
-        report = matchmaker.get_detailed_match_report(fid1, fid2)
+        with stage("matchmaker"):
+            report = matchmaker.get_detailed_match_report(fid1, fid2)
+        
+        if _wants_stream(request, stream):
+            return _stream_report(report)
         
         # Komedi ekle
-        report['comedy'] = comedy_generator.generate_match_commentary(
-            report['user1'],
-            report['user2'],
-            report['compatibility']
-        )
+        with stage("comedy"):
+            report['comedy'] = await comedy_generator.generate_match_commentary(
+                report['user1'],
+                report['user2'],
+                report['compatibility']
+            )
         
         return JSONResponse(content=report)
     
     except Exception as e:
+        ERRORS.inc(endpoint="compatibility")
+        logger.exception("Error in compatibility")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/commentary/{job_id}")
+async def get_commentary(job_id: str):
+    """
+    Arka planda üretilen AI yorumunu döner
+    Frame'ler template ile hemen cevap verir, AI metni buradan takip edilir
+    """
+    return JSONResponse(content=comedy_generator.commentary_status(job_id))
+
+
 @app.get("/api/generate-image/personality/{personality_type}")
-async def generate_personality_image(personality_type: str):
+async def generate_personality_image(personality_type: str, request: Request):
     """
-    Kişilik için görsel üret
-    Production'da: Gerçek görsel üretimi veya cache'lenmiş görseller
+    Kişilik kartı PNG
+    Kartlar başlangıçta çizilir; içerik tipe göre sabit olduğu için uzun cache
     """
-    # TODO: Gerçek görsel üretimi (PIL, Pillow, veya harici API)
-    return {"message": "Image generation endpoint", "type": personality_type}
+    image = await run_in_threadpool(image_renderer.personality_image, personality_type)
+    if image is None:
+        raise HTTPException(status_code=404, detail="Unknown personality type")
+    return _image_response(image, request, IMMUTABLE_CACHE)
 
 
 @app.get("/api/generate-image/match/{fid1}/{fid2}")
-async def generate_match_image(fid1: int, fid2: int):
-    """Eşleşme için görsel üret"""
-    # TODO: Gerçek görsel üretimi
-    return {"message": "Match image generation", "fids": [fid1, fid2]}
+async def generate_match_image(fid1: int, fid2: int, request: Request,
+                               score: Optional[float] = None):
+    """
+    Eşleşme görseli PNG
+    score verilmezse tip çiftinin deterministik skoru kullanılır
+    """
+    users = personality_analyzer.analyze_many([fid1, fid2])
+    type1 = users[fid1]['personality_type']
+    type2 = users[fid2]['personality_type']
+    if score is None:
+        score = personality_analyzer.expected_type_score(type1, type2)
+    
+    # Pillow çizimi (~45 ms) event loop'u bloklamasın
+    image = await run_in_threadpool(image_renderer.match_image, type1, type2, score)
+    return _image_response(image, request, MATCH_IMAGE_CACHE)
 
 
-@app.get("/api/leaderboard")
-async def get_leaderboard():
-    """En yüksek uyumluluklar leaderboard'u"""
-    # TODO: Database'den gerçek leaderboard
-    return {
-        "top_matches": [
-            {"user1": "@alice", "user2": "@bob", "score": 96.5},
-            {"user1": "@charlie", "user2": "@diana", "score": 94.2},
-            {"user1": "@eve", "user2": "@frank", "score": 92.8}
-        ]
+def _wants_stream(request: Request, stream: bool) -> bool:
+    return stream or "text/event-stream" in request.headers.get("accept", "")
+
+
+def _sse(event: str, data: Dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+def _stream_report(report: Dict) -> StreamingResponse:
+    """
+    Raporu SSE olarak akıtır
+    event: report  - skor, breakdown, güçlü yönler, öneriler (main_commentary null)
+    event: token   - OpenAI'dan gelen yorum parçaları
+    event: done    - birleşik main_commentary
+    """
+    report['comedy'] = comedy_generator.preview_match_commentary(
+        report['user1'],
+        report['user2'],
+        report['compatibility']
+    )
+    
+    async def events() -> AsyncIterator[bytes]:
+        yield _sse("report", report)
+        parts = []
+        try:
+            async for text in comedy_generator.stream_match_commentary(
+                report['user1'], report['user2'], report['compatibility']
+            ):
+                parts.append(text)
+                yield _sse("token", {"text": text})
+        except Exception:
+            ERRORS.inc(endpoint="commentary_stream")
+            logger.exception("Error in commentary stream")
+        yield _sse("done", {"main_commentary": "".join(parts).strip()})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _static_frame_response(asset: StaticAsset, request: Request) -> Response:
+    """Statik frame: Accept-Encoding'e uygun hazır gövde; varyantın ETag'i eşleşirse 304"""
+    body, encoding = asset.select(request.headers.get("accept-encoding"))
+    headers = {
+        "ETag": asset.etags[encoding],
+        "Cache-Control": STATIC_FRAME_CACHE,
+        "Vary": "Accept-Encoding"
     }
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=asset.media_type, headers=headers)
+
+
+def _image_response(image: RenderedImage, request: Request, cache_control: str) -> Response:
+    """ETag eşleşirse 304, yoksa PNG gövdesi"""
+    headers = {"ETag": image.etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), image.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=image.body, media_type="image/png", headers=headers)
+
+
+@app.get("/api/leaderboard")
+async def get_leaderboard(window: str = "all", limit: int = 10):
+    """En yüksek uyumluluklar leaderboard'u (window: all / daily / weekly)"""
+    try:
+        return {"window": window, "top_matches": matchmaker.leaderboard.top(window, limit)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 # ============== DEPLOYMENT HANDLER (Vercel için) ==============
@@ -0,0 +1,105 @@
+"""
+Match Cursor
+"Sonraki Eşleşme" için sıralı eşleşme listesi üzerinde imzalı, kompakt cursor
+Liste kısa ömürlü bir oturumda tutulur; cursor (fid, liste, sıra) taşır ve
+frame state'te client'a gider. Sonraki tık = imza kontrolü + listeden bir eleman.
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import base64
+import hashlib
+import hmac
+import itertools
+import os
+import random
+import struct
+import threading
+import time
+
+# fid (uint64), liste id (uint32), sıra (uint16)
+_CURSOR_FORMAT = ">QIH"
+_SIGNATURE_BYTES = 8
+
+
+class MatchCursor(NamedTuple):
+    fid: int
+    list_id: int
+    position: int
+
+
+class CursorCodec:
+    """
+    Cursor <-> URL-safe token (~30 karakter)
+    HMAC-SHA256'nın ilk 8 byte'ı ile imzalanır; secret FRAME_STATE_SECRET'tan
+    gelir, yoksa process başına rastgele (instance'lar arası cursor geçersiz olur)
+    """
+
+    def __init__(self, secret: Optional[bytes] = None):
+        env_secret = os.getenv("FRAME_STATE_SECRET")
+        self.secret = secret or (env_secret.encode() if env_secret else os.urandom(32))
+
+    def encode(self, cursor: MatchCursor) -> Optional[str]:
+        """Alanlar formata sığmıyorsa (ör. negatif fid) None: sayfalama state'siz kalır"""
+        try:
+            payload = struct.pack(_CURSOR_FORMAT, *cursor)
+        except struct.error:
+            return None
+        token = payload + self._sign(payload)
+        return base64.urlsafe_b64encode(token).rstrip(b"=").decode("ascii")
+
+    def decode(self, token: Optional[str]) -> Optional[MatchCursor]:
+        """Bozuk veya imzası geçersiz token için None"""
+        if not token:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        except (ValueError, TypeError):
+            return None
+        size = struct.calcsize(_CURSOR_FORMAT)
+        if len(raw) != size + _SIGNATURE_BYTES:
+            return None
+        payload, signature = raw[:size], raw[size:]
+        if not hmac.compare_digest(signature, self._sign(payload)):
+            return None
+        return MatchCursor(*struct.unpack(_CURSOR_FORMAT, payload))
+
+    def _sign(self, payload: bytes) -> bytes:
+        return hmac.new(self.secret, payload, hashlib.sha256).digest()[:_SIGNATURE_BYTES]
+
+
+class MatchSessions:
+    """
+    liste id -> (fid, sıralı eşleşmeler) LRU + TTL
+    Liste bir kez hesaplanır; sayfalama sadece indeksle okur
+    """
+
+    def __init__(self, max_sessions: int = 10_000, ttl: float = 1800):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions: "OrderedDict[int, Tuple[int, List[Dict], float]]" = OrderedDict()
+        self._ids = itertools.count(random.randrange(1 << 31))
+        self._lock = threading.Lock()
+
+    def create(self, fid: int, matches: List[Dict]) -> int:
+        list_id = next(self._ids) & 0xFFFFFFFF
+        with self._lock:
+            self._sessions[list_id] = (fid, matches, time.monotonic() + self.ttl)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return list_id
+
+    def get(self, list_id: int, fid: int) -> Optional[List[Dict]]:
+        """Başka kullanıcının listesi veya süresi dolmuş oturum için None"""
+        with self._lock:
+            entry = self._sessions.get(list_id)
+            if entry is None:
+                return None
+            owner, matches, expires_at = entry
+            if owner != fid or expires_at < time.monotonic():
+                return None
+            self._sessions.move_to_end(list_id)
+            return matches
+
+    def __len__(self) -> int:
+        return len(self._sessions)
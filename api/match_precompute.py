@@ -0,0 +1,229 @@
+"""
+Match Precompute
+Aktif FID'lerin top-N eşleşme listelerini önceden hesaplar; find_matches tıklamada
+tek anahtar okumasıyla cevap verir (liste yoksa/bayatsa canlı hesaplar)
+
+Kullanım (repo kökünden):
+    python -m api.match_precompute --fids-file active_fids.txt --workers 8 \\
+        --store-url sqlite:////data/matches.db
+    python -m api.match_precompute --fid-range 1000 10000 --top-n 10
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from .personality import PERSONALITY_PROFILES, PERSONALITY_TYPES, TYPE_INDEX
+from .profile_store import ProfileBackend, ProfileStore, create_backend
+
+DEFAULT_TOP_N = 10
+
+
+class PrecomputedMatches:
+    """
+    FID -> önceden hesaplanmış eşleşme listesi (JSON)
+    Kayıt: {"user_type", "computed_at", "top_n", "matches": [{"fid", "personality_type",
+    "compatibility"}]}. Kullanıcının tipi o zamandan beri değiştiyse veya kayıt
+    max_age'den eskiyse None döner. profiles verilirse tipi store'dakiyle artık
+    tutmayan adaylar listeden düşer; geriye num_matches'ten az kalırsa None.
+    """
+
+    def __init__(self, backend: ProfileBackend, max_age: float = 24 * 3600,
+                 profiles: Optional[ProfileStore] = None):
+        self.backend = backend
+        self.max_age = max_age
+        self.profiles = profiles
+
+    def get(self, fid: int, user_type: Optional[str], num_matches: int) -> Optional[List[Dict]]:
+        value = self.backend.get_many([fid]).get(fid)
+        if value is None:
+            return None
+        record = json.loads(value)
+        if user_type is not None and record["user_type"] != user_type:
+            return None
+        if time.time() - record["computed_at"] > self.max_age:
+            return None
+        if record["top_n"] < num_matches and len(record["matches"]) >= record["top_n"]:
+            return None
+        matches = record["matches"]
+        if self.profiles is not None:
+            current = self.profiles.get_many([match["fid"] for match in matches])
+            matches = [match for match in matches
+                       if current.get(match["fid"]) == match["personality_type"]]
+            if len(matches) < min(num_matches, len(record["matches"])):
+                return None
+        return matches[:num_matches]
+
+    def put_many(self, records: Dict[int, Tuple[str, int, List[Dict]]]) -> None:
+        """fid -> (user_type, top_n, matches)"""
+        now = time.time()
+        self.backend.put_many({
+            fid: json.dumps({
+                "user_type": user_type,
+                "computed_at": now,
+                "top_n": top_n,
+                "matches": [
+                    {
+                        "fid": match["fid"],
+                        "personality_type": match["personality_type"],
+                        "compatibility": match["compatibility"]
+                    }
+                    for match in matches
+                ]
+            }, separators=(",", ":"))
+            for fid, (user_type, top_n, matches) in records.items()
+        })
+
+
+def create_precomputed_matches(url: Optional[str] = None,
+                               profiles: Optional[ProfileStore] = None) -> Optional[PrecomputedMatches]:
+    """MATCH_STORE_URL yoksa None: find_matches her zaman canlı hesaplar"""
+    url = url or os.getenv("MATCH_STORE_URL")
+    if not url:
+        return None
+    return PrecomputedMatches(
+        create_backend(url, table="match_lists", column="matches"),
+        max_age=float(os.getenv("MATCH_STORE_MAX_AGE", str(24 * 3600))),
+        profiles=profiles
+    )
+
+
+def is_shared_store_url(url: Optional[str]) -> bool:
+    """Process'ler arası paylaşılan bir profile store mu (memory:// ve sqlite :memory: değil)"""
+    if not url or url.startswith("memory:"):
+        return False
+    if url.startswith("sqlite:"):
+        return url[len("sqlite:"):].lstrip("/") not in ("", ":memory:")
+    return True
+
+
+# Worker process durumu (_init_worker ile bir kez kurulur)
+_worker_matchmaker = None
+
+
+def _init_worker(candidate_dir: str) -> None:
+    """
+    Her worker kendi MatchmakerAI'ını kurar; indeksi ana process'in yazdığı
+    salt okunur aday dizilerinden (memmap, sayfalar process'ler arası paylaşılır) doldurur.
+    Tipler paylaşılan store'dan okunur, worker'lar sınıflama yapmaz.
+    """
+    global _worker_matchmaker
+    from .matching import MatchmakerAI
+
+    matchmaker = MatchmakerAI()
+    # Aday havuzu sadece aktif kullanıcılar: precompute kendi kendini okumasın,
+    # graf/demo FID'leri worker'a göre farklı tip almasın
+    matchmaker.precomputed = None
+    matchmaker.social_graph = None
+    matchmaker.demo_fill = False
+    fids = np.load(os.path.join(candidate_dir, "fids.npy"), mmap_mode="r")
+    codes = np.load(os.path.join(candidate_dir, "types.npy"), mmap_mode="r")
+    for fid, code in zip(fids.tolist(), codes.tolist()):
+        personality_type = PERSONALITY_TYPES[code]
+        matchmaker.index.add(fid, personality_type, PERSONALITY_PROFILES[personality_type])
+    _worker_matchmaker = matchmaker
+
+
+def _compute_shard(task: Tuple[List[int], int]) -> Dict[int, Tuple[str, int, List[Dict]]]:
+    fids, top_n = task
+    matchmaker = _worker_matchmaker
+    user_types = matchmaker.analyzer.store.get_many(fids)
+    return {
+        fid: (user_types[fid], top_n,
+              matchmaker.compute_matches(fid, top_n, record=False))
+        for fid in fids
+    }
+
+
+def _classify_active(active_fids: List[int], candidate_dir: str, chunk: int = 10_000) -> None:
+    """
+    Aktif FID'ler ana process'te bir kez analiz edilir (tipler paylaşılan store'a
+    yazılır) ve worker'lar için kompakt (fid, tip kodu) dizilerine dökülür
+    """
+    from .personality import PersonalityAnalyzer
+
+    analyzer = PersonalityAnalyzer()
+    codes = np.empty(len(active_fids), dtype=np.int8)
+    for start in range(0, len(active_fids), chunk):
+        fids = active_fids[start:start + chunk]
+        types = analyzer.store.get_or_compute_many(fids, analyzer._classify)
+        codes[start:start + len(fids)] = [TYPE_INDEX[types[fid]] for fid in fids]
+    np.save(os.path.join(candidate_dir, "fids.npy"), np.asarray(active_fids, dtype=np.int64))
+    np.save(os.path.join(candidate_dir, "types.npy"), codes)
+
+
+def precompute(active_fids: Iterable[int], store: PrecomputedMatches,
+               top_n: int = DEFAULT_TOP_N, workers: Optional[int] = None,
+               shard_size: int = 1000) -> Dict:
+    """
+    Aktif FID'leri parçalara bölüp process pool'da skorlar, sonuçları store'a yazar
+    Skorlama canlı yolla aynıdır (MatchmakerAI.compute_matches). Tipler ana
+    process'te bir kez atanır; PROFILE_STORE_URL paylaşılan bir store olmalıdır
+    (bkz. is_shared_store_url), yoksa uygulama listeleri farklı tiplerle görür.
+    """
+    started = time.perf_counter()
+    active_fids = list(dict.fromkeys(active_fids))
+    tasks = [(active_fids[start:start + shard_size], top_n)
+             for start in range(0, len(active_fids), shard_size)]
+
+    written = 0
+    with tempfile.TemporaryDirectory(prefix="match_precompute_") as candidate_dir:
+        _classify_active(active_fids, candidate_dir)
+        if workers == 1 or len(tasks) <= 1:
+            _init_worker(candidate_dir)
+            for records in map(_compute_shard, tasks):
+                store.put_many(records)
+                written += len(records)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(candidate_dir,)) as pool:
+                for records in pool.map(_compute_shard, tasks):
+                    store.put_many(records)
+                    written += len(records)
+
+    return {
+        "fids": len(active_fids),
+        "shards": len(tasks),
+        "written": written,
+        "seconds": round(time.perf_counter() - started, 2)
+    }
+
+
+def _read_fids(path: str) -> List[int]:
+    with open(path) as f:
+        return [int(line) for line in (line.strip() for line in f) if line and not line.startswith("#")]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--fids-file", help="satır başına bir aktif FID")
+    source.add_argument("--fid-range", type=int, nargs=2, metavar=("START", "END"))
+    parser.add_argument("--top-n", type=int, default=DEFAULT_TOP_N)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--shard-size", type=int, default=1000)
+    parser.add_argument("--store-url", default=None, help="MATCH_STORE_URL yerine")
+    args = parser.parse_args(argv)
+
+    store = create_precomputed_matches(args.store_url)
+    if store is None:
+        parser.error("--store-url or MATCH_STORE_URL is required")
+    if not is_shared_store_url(os.getenv("PROFILE_STORE_URL")):
+        parser.error("PROFILE_STORE_URL must point to the store the app uses "
+                     "(sqlite file, redis or postgres), not memory://")
+
+    fids = _read_fids(args.fids_file) if args.fids_file else list(range(*args.fid_range))
+    stats = precompute(fids, store, args.top_n, args.workers, args.shard_size)
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
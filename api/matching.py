@@ -4,79 +4,160 @@ Kullanıcıları eşleştiren ana algoritma
 """
 
 from typing import Dict, List, Optional
+import os
 import random
 from .personality import PersonalityAnalyzer, PERSONALITY_PROFILES
+from .scoring import BatchScorer, CandidatePool
+from .candidate_index import CandidateIndex
+from .leaderboard import create_leaderboard
+from .match_precompute import create_precomputed_matches
+from .social_graph import load_social_graph
 
 class MatchmakerAI:
     """Akıllı eşleştirme motoru"""
     
-    def __init__(self):
-        self.analyzer = PersonalityAnalyzer()
+    def __init__(self, analyzer: Optional[PersonalityAnalyzer] = None):
+        # Uygulamanın analyzer'ı paylaşılır (aynı profile store, ikinci kopya yok)
+        self.analyzer = analyzer or PersonalityAnalyzer()
+        self.scorer = BatchScorer(self.analyzer)
+        self.index = CandidateIndex()
+        self.leaderboard = create_leaderboard()
+        self.candidate_pool_size = int(os.getenv("MATCH_CANDIDATE_POOL", "200"))
+        # Aday eksik kalırsa random demo FID'lerle doldur (precompute kapatır)
+        self.demo_fill = True
+        # Opsiyonel follow grafı (python -m api.social_graph ingest ile üretilir)
+        self.social_graph = load_social_graph(os.getenv("SOCIAL_GRAPH_PATH"))
+        # Opsiyonel önceden hesaplanmış listeler (python -m api.match_precompute)
+        self.precomputed = create_precomputed_matches()
+        if self.precomputed is not None:
+            # Tipi değişmiş adaylar listeden düşsün
+            self.precomputed.profiles = self.analyzer.store
         self.cache = {}  # Basit cache (production'da Redis kullan)
     
     def find_matches(self, user_fid: int, num_matches: int = 3) -> List[Dict]:
         """
         Kullanıcı için en uyumlu kişileri bulur
-        Gerçek uygulamada: Farcaster social graph kullanılır
+        Önceden hesaplanmış liste varsa tek anahtar okuması, yoksa canlı hesap
+        """
+        if self.precomputed is not None:
+            user_type = self.analyzer.store.get(user_fid)
+            matches = self.precomputed.get(user_fid, user_type, num_matches)
+            if matches is not None:
+                return [
+                    self._format_match(match['fid'], match['personality_type'],
+                                       match['compatibility'])
+                    for match in matches
+                ]
+        return self.compute_matches(user_fid, num_matches)
+    
+    def compute_matches(self, user_fid: int, num_matches: int = 3,
+                        record: bool = True) -> List[Dict]:
+        """
+        Eşleşmeleri canlı hesaplar (analiz, aday getirme, vektörel skor, top N)
+        record=False: leaderboard'a yazılmaz (offline precompute)
         """
         
         # Kullanıcının kişiliğini analiz et
         user_analysis = self.analyzer.analyze_from_fid(user_fid)
-        
-        # Potansiyel eşleşmeleri bul (Demo: random FIDs)
-        potential_matches = self._get_potential_matches(user_fid)
-        
-        # Her potansiyel eşleşme için uyumluluk hesapla
-        scored_matches = []
-        for match_fid in potential_matches[:10]:  # İlk 10'u değerlendir
-            match_analysis = self.analyzer.analyze_from_fid(match_fid)
-            
-            compatibility = self.analyzer.calculate_compatibility(
-                user_analysis['profile'],
-                match_analysis['profile']
-            )
-            
-            scored_matches.append({
-                "fid": match_fid,
-                "username": f"@user{match_fid}",  # Gerçekte Farcaster API'den
-                "profile": match_analysis['profile'],
-                "compatibility": compatibility
-            })
-        
-        # Skora göre sırala ve top N'i al
-        scored_matches.sort(key=lambda x: x['compatibility']['total_score'], reverse=True)
-        
-        return scored_matches[:num_matches]
+        self.index.add_analyses([user_analysis])
+        
+        # Potansiyel eşleşmeleri bul (indeks + demo random FIDs)
+        potential_matches = self._get_potential_matches(user_fid, user_analysis['profile'])
+        
+        candidates = self.analyzer.analyze_many(potential_matches)
+        self.index.add_analyses(candidates.values())
+        
+        # avoid tipleri hiç skorlanmaz
+        avoid = set(user_analysis['profile'].get('avoid', []))
+        pool = CandidatePool.from_analyses([
+            candidate for candidate in candidates.values()
+            if candidate['personality_type'] not in avoid
+        ])
+        
+        # Tüm adayları tek vektörel geçişte skorla, sadece top N'i sırala
+        scores = self.scorer.score(user_analysis['profile'], pool)
+        winners = self.scorer.rank(pool, scores, num_matches)
+        if record and winners:
+            # Sadece döndürülen eşleşmeler, rastgele topluluk terimi olmadan:
+            # tekrar eden çağrılarda max alınan skor şansla şişmesin
+            rows = [winner['index'] for winner in winners]
+            self.leaderboard.record_many(user_fid, pool.fids[rows],
+                                         self.scorer.expected_totals(scores)[rows])
+        
+        return [
+            self._format_match(winner['fid'], winner['personality_type'],
+                               winner['compatibility'])
+            for winner in winners
+        ]
+    
+    @staticmethod
+    def _format_match(fid: int, personality_type: str, compatibility: Dict) -> Dict:
+        return {
+            "fid": fid,
+            "username": f"@user{fid}",  # UserResolver varsa gerçek username ile değiştirilir
+            "personality_type": personality_type,
+            "profile": PERSONALITY_PROFILES[personality_type],
+            "compatibility": compatibility
+        }
     
-    def _get_potential_matches(self, user_fid: int) -> List[int]:
+    def _get_potential_matches(self, user_fid: int, user_profile: Optional[Dict] = None) -> List[int]:
         """
         Potansiyel eşleşmeleri getirir
-        Gerçek uygulamada: Farcaster social graph, followers, following
+        Önce social graph'tan arkadaşın arkadaşları (ortak bağlantı sırasıyla),
+        sonra indeksten (ideal tipler önce, avoid tipler hariç), eksik kalırsa demo FID'ler
         """
-        # Demo için random FIDs
-        return [random.randint(1000, 9999) for _ in range(20)]
+        candidates = []
+        if self.social_graph is not None:
+            candidates = self.social_graph.two_hop(user_fid, limit=self.candidate_pool_size).tolist()
+        
+        missing = self.candidate_pool_size - len(candidates)
+        if user_profile is not None and missing > 0:
+            seen = set(candidates)
+            seen.add(user_fid)
+            # Graftan gelenlerle çakışanlar için biraz fazlasını iste
+            indexed = self.index.retrieve(user_fid, user_profile, missing + len(candidates))
+            candidates += [fid for fid in indexed if fid not in seen][:missing]
+        
+        missing = self.candidate_pool_size - len(candidates)
+        if self.demo_fill and missing > 0:
+            # Demo için random FIDs (tekrarsız, kullanıcının kendisi hariç)
+            # Havuz 1000-9999'a sığmıyorsa aralık havuz kadar genişletilir
+            seen = set(candidates)
+            seen.add(user_fid)
+            wanted = missing + len(seen)
+            fids = random.sample(range(1000, max(10000, 1000 + wanted)), wanted)
+            candidates += [fid for fid in fids if fid not in seen][:missing]
+        
+        return candidates
     
     def get_detailed_match_report(self, user1_fid: int, user2_fid: int) -> Dict:
         """İki kullanıcı için detaylı eşleşme raporu"""
         
         user1 = self.analyzer.analyze_from_fid(user1_fid)
         user2 = self.analyzer.analyze_from_fid(user2_fid)
+        self.index.add_analyses([user1, user2])
         
         compatibility = self.analyzer.calculate_compatibility(
             user1['profile'],
             user2['profile']
         )
+        self.leaderboard.record(user1_fid, user2_fid,
+                                self.analyzer.expected_score(user1['profile'], user2['profile']))
         
         return {
             "user1": {
                 "fid": user1_fid,
                 "personality": user1['profile']['name'],
-                "description": user1['profile']['description']
+                "description": user1['profile']['description'],
+                "personality_type": user1['personality_type'],
+                "profile": user1['profile']
             },
             "user2": {
                 "fid": user2_fid,
                 "personality": user2['profile']['name'],
-                "description": user2['profile']['description']
+                "description": user2['profile']['description'],
+                "personality_type": user2['personality_type'],
+                "profile": user2['profile']
             },
             "compatibility": compatibility,
             "strengths": self._identify_relationship_strengths(user1, user2),
@@ -0,0 +1,173 @@
+"""
+Metrics
+Aşama bazlı süre ölçümü, Prometheus metinleri ve Server-Timing başlığı
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import bisect
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(str(labels.get(name, "")) for name in self.labelnames), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # etiket -> (bucket sayaçları, toplam, adet)
+        self._series: Dict[LabelValues, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {count}")
+                plain = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{plain} {total}")
+                lines.append(f"{self.name}_count{plain} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["route", "method"]
+))
+STAGE_DURATION = REGISTRY.register(Histogram(
+    "stage_duration_seconds", "Latency of internal request stages", ["stage"]
+))
+LLM_CALLS = REGISTRY.register(Counter(
+    "llm_calls_total", "Upstream LLM completions by kind and outcome", ["kind", "outcome"]
+))
+LLM_COALESCED = REGISTRY.register(Counter(
+    "llm_coalesced_total", "LLM calls that joined an identical in-flight completion", ["kind"]
+))
+LLM_FALLBACKS = REGISTRY.register(Counter(
+    "llm_fallbacks_total", "Template fallbacks served instead of LLM output", ["kind"]
+))
+CIRCUIT_TRANSITIONS = REGISTRY.register(Counter(
+    "circuit_breaker_transitions_total", "Circuit breaker state changes", ["breaker", "state"]
+))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "cache_lookups_total", "Cache lookups by cache and result", ["cache", "result"]
+))
+USER_LOOKUP_BATCHES = REGISTRY.register(Counter(
+    "farcaster_user_lookup_batches_total", "Bulk Farcaster user lookups by outcome", ["outcome"]
+))
+ERRORS = REGISTRY.register(Counter(
+    "endpoint_errors_total", "Unhandled errors caught in endpoints", ["endpoint"]
+))
+
+# Aktif isteğin aşama süreleri (Server-Timing için); istek dışında None
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def start_request() -> List[Tuple[str, float]]:
+    """İstek başında çağrılır; aşamalar bu listeye yazılır"""
+    timings: List[Tuple[str, float]] = []
+    _request_timings.set(timings)
+    return timings
+
+
+def detach_request() -> None:
+    """Arka plan işleri istek bağlamını miras almasın"""
+    _request_timings.set(None)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Bir aşamayı ölçer: histogram + (istek içindeyse) Server-Timing"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_DURATION.observe(elapsed, stage=name)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((name, elapsed))
+
+
+def server_timing_header(timings: List[Tuple[str, float]], total: float) -> str:
+    """Aynı isimli aşamalar toplanır; süreler ms"""
+    merged: Dict[str, float] = {}
+    for name, elapsed in timings:
+        merged[name] = merged.get(name, 0.0) + elapsed
+    entries = [f"{name};dur={elapsed * 1000:.2f}" for name, elapsed in merged.items()]
+    entries.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(entries)
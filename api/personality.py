@@ -3,10 +3,16 @@ Crypto Personality Analyzer
 Kullanıcının crypto kişiliğini analiz eder
 """
 
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 from enum import Enum
+import json
 import random
 
+from .profile_store import ProfileStore, get_default_store
+
+if TYPE_CHECKING:
+    from .scoring import FeatureRecord
+
 class CryptoPersonality(str, Enum):
     BITCOIN_MAXI = "bitcoin_maxi"
     DEFI_DEGEN = "defi_degen"
@@ -137,25 +143,63 @@ PERSONALITY_PROFILES = {
 class PersonalityAnalyzer:
     """Kullanıcının crypto kişiliğini analiz eder"""
     
-    def __init__(self):
+    def __init__(self, store: Optional[ProfileStore] = None):
         self.profiles = PERSONALITY_PROFILES
+        self._store = store
+    
+    @property
+    def store(self) -> ProfileStore:
+        """FID -> tip deposu (verilmediyse paylaşılan varsayılan store)"""
+        if self._store is None:
+            self._store = get_default_store()
+        return self._store
     
     def analyze_from_fid(self, fid: int, user_data: Optional[Dict] = None) -> Dict:
         """
         Farcaster ID'den kişilik analizi yapar
-        Gerçek uygulamada: user'ın cast history, follows, reactions analiz edilir
+        Cast geçmişi analiz edilmiş FID'lerin tipi store'dan gelir
+        (python -m api.cast_classifier); store'da olmayanlar _classify ile atanır.
+        Sonuç store'a yazılır; aynı FID her endpoint'te aynı tipi alır
         """
+        return self.analyze_many([fid])[fid]
+    
+    def analyze_many(self, fids: List[int]) -> Dict[int, Dict]:
+        """Birden çok FID için toplu analiz (tek store okuması)"""
+        types = self.store.get_or_compute_many(fids, self._classify)
+        return {fid: self._build_analysis(fid, personality_type)
+                for fid, personality_type in types.items()}
+    
+    def _classify(self, fid: int) -> str:
+        """Yeni bir FID için kişilik tipi belirler"""
         # Demo için: Random kişilik atama (gerçekte AI analiz yapılır)
-        personality_type = random.choice(list(CryptoPersonality))
-        profile = self.profiles[personality_type.value]
+        return random.choice(list(CryptoPersonality)).value
+    
+    def _build_analysis(self, fid: int, personality_type: str) -> Dict:
+        profile = self.profiles[personality_type]
+        
+        # Analiz sadece tipe bağlı: tip başına bir kez üretilir (salt okunur)
+        analysis = ANALYSIS_BY_TYPE.get(personality_type)
+        if analysis is None or profile is not PERSONALITY_PROFILES[personality_type]:
+            analysis = self._generate_detailed_analysis(profile)
         
         return {
             "fid": fid,
-            "personality_type": personality_type.value,
+            "personality_type": personality_type,
             "profile": profile,
-            "analysis": self._generate_detailed_analysis(profile)
+            "analysis": analysis
         }
     
+    def analysis_payload(self, fid: int) -> bytes:
+        """
+        analyze_from_fid çıktısının JSON byte'ları
+        Tipe bağlı gövde önceden serialize edilir, sadece fid eklenir
+        """
+        personality_type = self.store.get_or_compute_many([fid], self._classify)[fid]
+        suffix = ANALYSIS_PAYLOAD_SUFFIX.get(personality_type)
+        if suffix is None or self.profiles is not PERSONALITY_PROFILES:
+            return _dump_json(self._build_analysis(fid, personality_type))
+        return b'{"fid":%d,' % fid + suffix
+    
     def _generate_detailed_analysis(self, profile: Dict) -> Dict:
         """Detaylı kişilik analizi üretir"""
         return {
@@ -205,60 +249,109 @@ class PersonalityAnalyzer:
     
     def calculate_compatibility(self, user1_profile: Dict, user2_profile: Dict) -> Dict:
         """İki kullanıcı arasında uyumluluk hesaplar"""
+        return self._score_pair(self._pair_components(user1_profile, user2_profile))
+    
+    def calculate_type_compatibility(self, type1: str, type2: str) -> Dict:
+        """İki kişilik tipi arasında uyumluluk (tablodan)"""
+        return self._score_pair(_pair_table()[TYPE_INDEX[type1]][TYPE_INDEX[type2]])
+    
+    def expected_type_score(self, type1: str, type2: str) -> float:
+        """Topluluk skoru yerine ortalaması (0.85) ile deterministik toplam skor"""
+        components = _pair_table()[TYPE_INDEX[type1]][TYPE_INDEX[type2]]
+        return round((components["base_score"] + 0.85 * 0.10) * 100, 1)
+    
+    def expected_score(self, user1_profile: Dict, user2_profile: Dict) -> float:
+        """expected_type_score'un profil karşılığı (leaderboard gibi tekrar eden kayıtlar için)"""
+        components = self._pair_components(user1_profile, user2_profile)
+        return round((components["base_score"] + 0.85 * 0.10) * 100, 1)
+    
+    def calculate_compatibility_batch(self, user_profile: Dict, 
+                                      candidate_profiles: List[Dict]) -> List[Dict]:
+        """
+        Bir profili birçok profile karşı skorlar
+        Sıralama candidate_profiles ile aynıdır
+        """
+        user_index = _profile_index(user_profile)
+        if user_index is None:
+            return [self.calculate_compatibility(user_profile, p) for p in candidate_profiles]
+        
+        row = _pair_table()[user_index]
+        results = []
+        for profile in candidate_profiles:
+            index = _profile_index(profile)
+            components = (row[index] if index is not None
+                          else self._compute_components(user_profile, profile))
+            results.append(self._score_pair(components))
+        return results
+    
+    def _pair_components(self, user1_profile: Dict, user2_profile: Dict) -> Dict:
+        """Deterministik alt skorlar - bilinen tipler için tablodan"""
+        index1 = _profile_index(user1_profile)
+        index2 = _profile_index(user2_profile)
+        if index1 is not None and index2 is not None:
+            return _pair_table()[index1][index2]
+        return self._compute_components(user1_profile, user2_profile)
+    
+    def _compute_components(self, user1_profile: Dict, user2_profile: Dict) -> Dict:
+        """
+        Topluluk skoru hariç dört bileşeni hesaplar
+        Profiller bitmask kayıtlarına çevrilir (scoring modülü bu modülü import
+        ettiği için import burada)
+        """
+        from .scoring import feature_record
+        return self.record_components(feature_record(user1_profile), feature_record(user2_profile))
+    
+    def record_components(self, features1: "FeatureRecord", features2: "FeatureRecord") -> Dict:
+        """
+        _compute_components'ın kayıt karşılığı - kullanıcı başına kayıtlar bir kez
+        kurulup saklanıyorsa çift skoru sadece bit işlemleridir
+        """
         
         # Token preference compatibility (30%)
-        token_score = self._calculate_token_compatibility(
-            user1_profile["token_preference"],
-            user2_profile["token_preference"]
-        ) * 0.30
+        token_score = self._calculate_token_compatibility(features1, features2) * 0.30
         
         # Risk tolerance compatibility (25%)
-        risk_score = self._calculate_risk_compatibility(
-            user1_profile["risk_tolerance"],
-            user2_profile["risk_tolerance"]
-        ) * 0.25
+        risk_score = self._calculate_risk_compatibility(features1.risk, features2.risk) * 0.25
         
         # Trait compatibility (20%)
-        trait_score = self._calculate_trait_compatibility(
-            user1_profile["traits"],
-            user2_profile["traits"]
-        ) * 0.20
+        trait_score = self._calculate_trait_compatibility(features1, features2) * 0.20
         
         # Ideal match bonus (15%)
-        match_bonus = self._calculate_ideal_match_bonus(
-            user1_profile.get("ideal_match", []),
-            user2_profile.get("ideal_match", []),
-            user1_profile.get("avoid", []),
-            user2_profile.get("avoid", [])
-        ) * 0.15
+        match_bonus = self._calculate_ideal_match_bonus(features1, features2) * 0.15
+        
+        return {
+            "base_score": token_score + risk_score + trait_score + match_bonus,
+            "breakdown": {
+                "token_preferences": round(token_score * 100 / 0.30, 1),
+                "risk_tolerance": round(risk_score * 100 / 0.25, 1),
+                "personality_traits": round(trait_score * 100 / 0.20, 1),
+                "ideal_match_factor": round(match_bonus * 100 / 0.15, 1)
+            }
+        }
+    
+    def _score_pair(self, components: Dict) -> Dict:
+        """Deterministik bileşenlere topluluk skorunu ekler"""
         
         # Community engagement (10%)
         community_score = random.uniform(0.7, 1.0) * 0.10
         
-        total_score = (token_score + risk_score + trait_score + 
-                      match_bonus + community_score) * 100
+        total_score = (components["base_score"] + community_score) * 100
+        
+        breakdown = dict(components["breakdown"])
+        breakdown["community_vibe"] = round(community_score * 100 / 0.10, 1)
         
         return {
             "total_score": round(total_score, 1),
-            "breakdown": {
-                "token_preferences": round(token_score * 100 / 0.30, 1),
-                "risk_tolerance": round(risk_score * 100 / 0.25, 1),
-                "personality_traits": round(trait_score * 100 / 0.20, 1),
-                "ideal_match_factor": round(match_bonus * 100 / 0.15, 1),
-                "community_vibe": round(community_score * 100 / 0.10, 1)
-            },
+            "breakdown": breakdown,
             "interpretation": self._interpret_score(total_score)
         }
     
-    def _calculate_token_compatibility(self, tokens1: List, tokens2: List) -> float:
+    def _calculate_token_compatibility(self, features1: "FeatureRecord",
+                                       features2: "FeatureRecord") -> float:
         """Token tercih uyumluluğu"""
-        # Aynı tokenlar varsa yüksek skor
-        common = set(tokens1) & set(tokens2)
-        if common:
+        # Aynı tokenlar varsa yüksek skor (ortak BTC de buraya düşer)
+        if features1.token_overlap(features2):
             return 0.9
-        # Alakalı ekosistemler
-        if any(t in ["BTC"] for t in tokens1) and any(t in ["BTC"] for t in tokens2):
-            return 0.8
         return 0.5
     
     def _calculate_risk_compatibility(self, risk1: int, risk2: int) -> float:
@@ -271,19 +364,20 @@ class PersonalityAnalyzer:
         else:
             return 0.4
     
-    def _calculate_trait_compatibility(self, traits1: List, traits2: List) -> float:
+    def _calculate_trait_compatibility(self, features1: "FeatureRecord",
+                                       features2: "FeatureRecord") -> float:
         """Karakter özelliği uyumluluğu"""
-        common = set(traits1) & set(traits2)
-        return len(common) / max(len(traits1), len(traits2))
+        common = features1.trait_overlap(features2)
+        return common / max(features1.trait_count, features2.trait_count)
     
-    def _calculate_ideal_match_bonus(self, ideal1: List, ideal2: List, 
-                                     avoid1: List, avoid2: List) -> float:
+    def _calculate_ideal_match_bonus(self, features1: "FeatureRecord",
+                                     features2: "FeatureRecord") -> float:
         """İdeal eşleşme bonus puanı"""
-        # Birbirinin ideal listesinde mi?
-        if any(x in ideal1 for x in ideal2) or any(x in ideal2 for x in ideal1):
+        # Ortak ideal tip var mı?
+        if features1.ideal_mask & features2.ideal_mask:
             return 1.0
-        # Birbirinin avoid listesinde mi?
-        if any(x in avoid1 for x in avoid2) or any(x in avoid2 for x in avoid1):
+        # Ortak avoid tipi var mı?
+        if features1.avoid_mask & features2.avoid_mask:
             return 0.3
         return 0.6
     
@@ -298,4 +392,70 @@ class PersonalityAnalyzer:
         elif score >= 60:
             return "🤝 ORTA DÜZEY - Arkadaş olarak başlayın belki?"
         else:
-            return "🤷 FARKLI DÜNYALAR - Ama opposites attract derler!"
\ No newline at end of file
+            return "🤷 FARKLI DÜNYALAR - Ama opposites attract derler!"
+
+
+# ============== TİP ÇİFTİ TABLOSU ==============
+
+PERSONALITY_TYPES = [personality.value for personality in CryptoPersonality]
+TYPE_INDEX = {personality_type: index for index, personality_type in enumerate(PERSONALITY_TYPES)}
+
+# Profil dict'leri paylaşılan nesneler; kimlikten tip indeksine hızlı geçiş
+_PROFILE_INDEX = {id(PERSONALITY_PROFILES[t]): i for t, i in TYPE_INDEX.items()}
+
+
+def _profile_index(profile: Dict) -> Optional[int]:
+    """Profil PERSONALITY_PROFILES'tan geliyorsa tip indeksi, değilse None"""
+    return _PROFILE_INDEX.get(id(profile))
+
+
+def _build_pair_table() -> List[List[Dict]]:
+    """10x10 deterministik alt skor tablosu"""
+    analyzer = PersonalityAnalyzer()
+    return [
+        [analyzer._compute_components(PERSONALITY_PROFILES[t1], PERSONALITY_PROFILES[t2])
+         for t2 in PERSONALITY_TYPES]
+        for t1 in PERSONALITY_TYPES
+    ]
+
+
+_PAIR_TABLE: Optional[List[List[Dict]]] = None
+
+
+def _pair_table() -> List[List[Dict]]:
+    """
+    Tablo ilk kullanımda bir kez kurulur - import sırasında değil, çünkü
+    bileşenler scoring modülünün kayıtlarıyla hesaplanır ve scoring bu modülü import eder
+    """
+    global _PAIR_TABLE
+    if _PAIR_TABLE is None:
+        _PAIR_TABLE = _build_pair_table()
+    return _PAIR_TABLE
+
+
+
+# ============== TİP BAŞINA HAZIR ANALİZ ==============
+
+def _dump_json(content) -> bytes:
+    """JSONResponse ile aynı biçim"""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def _build_analysis_cache():
+    analyzer = PersonalityAnalyzer()
+    analyses = {t: analyzer._generate_detailed_analysis(PERSONALITY_PROFILES[t])
+                for t in PERSONALITY_TYPES}
+    # '{"fid":' sonrası kısım: {"personality_type":..,"profile":..,"analysis":..}
+    suffixes = {
+        t: _dump_json({
+            "personality_type": t,
+            "profile": PERSONALITY_PROFILES[t],
+            "analysis": analyses[t]
+        })[1:]
+        for t in PERSONALITY_TYPES
+    }
+    return analyses, suffixes
+
+
+ANALYSIS_BY_TYPE, ANALYSIS_PAYLOAD_SUFFIX = _build_analysis_cache()
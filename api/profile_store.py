@@ -0,0 +1,249 @@
+"""
+Profile Store
+FID -> kişilik tipi kalıcı deposu (read-through cache + değiştirilebilir backend)
+"""
+
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import math
+import os
+import sqlite3
+import threading
+import time
+
+
+class ProfileBackend:
+    """Backend arayüzü: toplu okuma ve yazma"""
+
+    def get_many(self, fids: List[int]) -> Dict[int, str]:
+        raise NotImplementedError
+
+    def put_many(self, records: Dict[int, str]) -> None:
+        raise NotImplementedError
+
+
+class MemoryBackend(ProfileBackend):
+    """Process içi dict (testler ve tek instance için)"""
+
+    def __init__(self):
+        self._data: Dict[int, str] = {}
+
+    def get_many(self, fids: List[int]) -> Dict[int, str]:
+        return {fid: self._data[fid] for fid in fids if fid in self._data}
+
+    def put_many(self, records: Dict[int, str]) -> None:
+        self._data.update(records)
+
+
+class SQLiteBackend(ProfileBackend):
+    """Yerel SQLite dosyası"""
+
+    # SQLite parametre limiti (eski sürümlerde 999)
+    CHUNK = 900
+
+    def __init__(self, path: str = ":memory:", table: str = "profiles",
+                 column: str = "personality_type"):
+        self._lock = threading.Lock()
+        self._table = table
+        self._column = column
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            f"fid INTEGER PRIMARY KEY, {column} TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, fids: List[int]) -> Dict[int, str]:
+        result = {}
+        with self._lock:
+            for start in range(0, len(fids), self.CHUNK):
+                chunk = fids[start:start + self.CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT fid, {self._column} FROM {self._table} WHERE fid IN ({placeholders})",
+                    chunk
+                )
+                result.update(rows)
+        return result
+
+    def put_many(self, records: Dict[int, str]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self._table} (fid, {self._column}) VALUES (?, ?)",
+                records.items()
+            )
+            self._conn.commit()
+
+
+class RedisBackend(ProfileBackend):
+    """Redis hash: tek HMGET ile toplu okuma"""
+
+    def __init__(self, url: str, key: str = "crypto_compat:personality"):
+        import redis
+
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._key = key
+
+    def get_many(self, fids: List[int]) -> Dict[int, str]:
+        if not fids:
+            return {}
+        values = self._redis.hmget(self._key, fids)
+        return {fid: value for fid, value in zip(fids, values) if value is not None}
+
+    def put_many(self, records: Dict[int, str]) -> None:
+        if records:
+            self._redis.hset(self._key, mapping=records)
+
+
+class PostgresBackend(ProfileBackend):
+    """Postgres tablosu: ANY(%s) ile toplu okuma, upsert ile yazma"""
+
+    def __init__(self, dsn: str, table: str = "profiles", column: str = "personality_type"):
+        import psycopg2
+
+        self._lock = threading.Lock()
+        self._table = table
+        self._column = column
+        self._conn = psycopg2.connect(dsn)
+        self._conn.autocommit = True
+        with self._conn.cursor() as cur:
+            cur.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                f"fid BIGINT PRIMARY KEY, {column} TEXT NOT NULL)"
+            )
+
+    def get_many(self, fids: List[int]) -> Dict[int, str]:
+        if not fids:
+            return {}
+        with self._lock, self._conn.cursor() as cur:
+            cur.execute(
+                f"SELECT fid, {self._column} FROM {self._table} WHERE fid = ANY(%s)",
+                (list(fids),)
+            )
+            return dict(cur.fetchall())
+
+    def put_many(self, records: Dict[int, str]) -> None:
+        if not records:
+            return
+        from psycopg2.extras import execute_values
+
+        with self._lock, self._conn.cursor() as cur:
+            execute_values(
+                cur,
+                f"INSERT INTO {self._table} (fid, {self._column}) VALUES %s "
+                f"ON CONFLICT (fid) DO UPDATE SET {self._column} = EXCLUDED.{self._column}",
+                list(records.items())
+            )
+
+
+def create_backend(url: Optional[str] = None, table: str = "profiles",
+                   column: str = "personality_type") -> ProfileBackend:
+    """
+    URL'ye göre backend seçer
+    memory:// | sqlite:///path.db | redis://... | postgres://...
+    table/column aynı altyapıda başka FID -> metin verisi tutmak için
+    (Redis'te hash anahtarı crypto_compat:<table>)
+    """
+    url = url or os.getenv("PROFILE_STORE_URL", "memory://")
+    if url.startswith("memory:"):
+        return MemoryBackend()
+    if url.startswith("sqlite:"):
+        path = url[len("sqlite:"):].lstrip("/") or ":memory:"
+        if url.startswith("sqlite:////"):
+            path = "/" + path
+        return SQLiteBackend(path, table, column)
+    if url.startswith(("redis://", "rediss://")):
+        if table == "profiles":
+            return RedisBackend(url)
+        return RedisBackend(url, key=f"crypto_compat:{table}")
+    if url.startswith(("postgres://", "postgresql://")):
+        return PostgresBackend(url, table, column)
+    raise ValueError(f"Unsupported profile store URL: {url}")
+
+
+class ProfileStore:
+    """
+    Backend önünde process içi LRU + TTL
+    Bir FID'in tipi bir kez hesaplanır, sonra cache/backend'den O(1) okunur.
+    Cache kayıtları cache_ttl sonra düşer; başka bir process'in backend'e yazdığı
+    tip değişikliği (reanalysis, cast_classifier) en geç bu süre sonra görülür.
+    """
+
+    def __init__(self, backend: Optional[ProfileBackend] = None, cache_size: int = 100_000,
+                 cache_ttl: Optional[float] = 300):
+        self.backend = backend or MemoryBackend()
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        # fid -> (bitiş zamanı, tip); cache_ttl None ise süresiz
+        self._cache: "OrderedDict[int, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, fid: int) -> Optional[str]:
+        return self.get_many([fid]).get(fid)
+
+    def get_many(self, fids: Iterable[int]) -> Dict[int, str]:
+        """Önce cache, eksik veya süresi dolmuşlar tek backend çağrısıyla"""
+        result: Dict[int, str] = {}
+        missing: List[int] = []
+        now = time.monotonic()
+        with self._lock:
+            for fid in fids:
+                entry = self._cache.get(fid)
+                if entry is None or entry[0] <= now:
+                    missing.append(fid)
+                else:
+                    self._cache.move_to_end(fid)
+                    result[fid] = entry[1]
+
+        if missing:
+            loaded = self.backend.get_many(missing)
+            self._remember(loaded)
+            result.update(loaded)
+        return result
+
+    def put(self, fid: int, personality_type: str) -> None:
+        self.put_many({fid: personality_type})
+
+    def put_many(self, records: Dict[int, str]) -> None:
+        if records:
+            self.backend.put_many(records)
+            self._remember(records)
+
+    def get_or_compute_many(self, fids: Iterable[int],
+                            compute: Callable[[int], str]) -> Dict[int, str]:
+        """Read-through: depoda olmayan FID'ler hesaplanıp yazılır"""
+        fids = list(dict.fromkeys(fids))
+        result = self.get_many(fids)
+        computed = {fid: compute(fid) for fid in fids if fid not in result}
+        self.put_many(computed)
+        result.update(computed)
+        return result
+
+    def invalidate(self, fids: Iterable[int]) -> None:
+        """Process içi cache'den düşürür (backend dokunulmaz)"""
+        with self._lock:
+            for fid in fids:
+                self._cache.pop(fid, None)
+
+    def _remember(self, records: Dict[int, str]) -> None:
+        expires_at = time.monotonic() + self.cache_ttl if self.cache_ttl is not None else math.inf
+        with self._lock:
+            for fid, value in records.items():
+                self._cache[fid] = (expires_at, value)
+                self._cache.move_to_end(fid)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+
+_default_store: Optional[ProfileStore] = None
+
+
+def get_default_store() -> ProfileStore:
+    """Uygulama genelinde paylaşılan store (PROFILE_STORE_URL ile yapılandırılır)"""
+    global _default_store
+    if _default_store is None:
+        _default_store = ProfileStore(
+            create_backend(),
+            cache_ttl=float(os.getenv("PROFILE_CACHE_TTL", "300"))
+        )
+    return _default_store
@@ -0,0 +1,184 @@
+"""
+Incremental Re-analysis
+FID başına watermark + birikmiş özellik sayıları; sadece yeni cast'i olan
+FID'ler yeniden skorlanır ve tipi değişenler store'a (ve indekse) yazılır
+
+Kullanım (repo kökünden, her yeni export dilimi için):
+    python -m api.reanalysis casts-2024-06-01.jsonl --state data/features.db --workers 4
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+import time
+
+import numpy as np
+
+from .cast_classifier import (FEATURES, FeatureCounts, classify_counts, count_features,
+                              merge_counts, shard_files)
+from .personality import PERSONALITY_PROFILES, PERSONALITY_TYPES
+from .profile_store import ProfileStore, create_backend, get_default_store
+
+# Hiç cast'i işlenmemiş FID: timestamp'i 0 olan cast'ler de sayılsın
+# (timestamp'i olmayan cast'ler count_features'ta her zaman atlanır)
+NO_WATERMARK = -1
+
+
+class FeatureState:
+    """
+    SQLite'ta FID başına durum: watermark (işlenen son cast timestamp'i),
+    cast sayısı, float32 özellik sayıları (blob) ve son atanan tip
+    Özellik listesi (FEATURES) değişirse eski sayılar geçersizdir: ValueError.
+    """
+
+    CHUNK = 900
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS feature_state ("
+            "fid INTEGER PRIMARY KEY, watermark INTEGER NOT NULL, casts INTEGER NOT NULL, "
+            "counts BLOB NOT NULL, personality_type TEXT)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'features'").fetchone()
+        features = json.dumps(FEATURES)
+        if row is None:
+            self._conn.execute("INSERT INTO meta (key, value) VALUES ('features', ?)", (features,))
+        elif row[0] != features:
+            raise ValueError(f"{path}: feature list changed, rebuild the state from full history")
+        self._conn.commit()
+
+    def watermark(self, fid: int) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT watermark FROM feature_state WHERE fid = ?", (fid,)
+            ).fetchone()
+        return row[0] if row is not None else NO_WATERMARK
+
+    def load(self, fids: List[int]) -> Dict[int, Tuple[int, int, np.ndarray, Optional[str]]]:
+        """fid -> (watermark, casts, counts, personality_type)"""
+        result = {}
+        with self._lock:
+            for start in range(0, len(fids), self.CHUNK):
+                chunk = fids[start:start + self.CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    "SELECT fid, watermark, casts, counts, personality_type FROM feature_state "
+                    f"WHERE fid IN ({placeholders})",
+                    chunk
+                )
+                for fid, watermark, casts, counts, personality_type in rows:
+                    result[fid] = (watermark, casts, np.frombuffer(counts, dtype=np.float32),
+                                   personality_type)
+        return result
+
+    def save(self, rows: Iterable[Tuple[int, int, int, np.ndarray, Optional[str]]]) -> None:
+        """(fid, watermark, casts, counts, personality_type) satırları"""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO feature_state "
+                "(fid, watermark, casts, counts, personality_type) VALUES (?, ?, ?, ?, ?)",
+                ((fid, watermark, casts, counts.astype(np.float32).tobytes(), personality_type)
+                 for fid, watermark, casts, counts, personality_type in rows)
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM feature_state").fetchone()[0]
+
+
+def _count_delta(task: Tuple[Tuple[str, int, Optional[int]], str]) -> FeatureCounts:
+    """Process pool worker: kendi bağlantısıyla watermark'ları okur"""
+    shard, state_path = task
+    return count_features(shard, FeatureState(state_path).watermark)
+
+
+def refresh(paths: Iterable[str], state: FeatureState, store: Optional[ProfileStore] = None,
+            index=None, workers: Optional[int] = None, shard_bytes: int = 64 * 1024 * 1024,
+            min_signal: float = 3.0) -> Dict:
+    """
+    Yeni cast dosyalarını mevcut duruma katar
+
+    Watermark'tan eski cast'ler sayılmaz; aynı dosyayı tekrar vermek sonucu
+    değiştirmez. Watermark'la aynı timestamp'li cast'ler de atlanır: dilimler
+    saniye sınırında kesilmelidir (bkz. count_features). Maliyet sadece yeni cast'ler ve aktif FID'lerin durum satırları
+    kadardır. Tipi değişen FID'ler store'a, index verilmişse (CandidateIndex)
+    indekse de yazılır. Zayıf sinyalde önceki tip korunur.
+    """
+    started = time.perf_counter()
+    store = store or get_default_store()
+    shards = shard_files(paths, shard_bytes)
+
+    # :memory: durum başka process'ten okunamaz
+    if workers == 1 or len(shards) == 1 or state.path == ":memory:":
+        parts = [count_features(shard, state.watermark) for shard in shards]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_count_delta, [(shard, state.path) for shard in shards]))
+
+    fids, totals, casts, watermarks, untimestamped = merge_counts(parts)
+    new_casts = int(casts.sum())
+    previous = state.load(fids.tolist())
+    previous_types: List[Optional[str]] = [None] * fids.size
+    for row, fid in enumerate(fids.tolist()):
+        entry = previous.get(fid)
+        if entry is not None:
+            watermark, old_casts, old_counts, previous_types[row] = entry
+            totals[row] += old_counts
+            casts[row] += old_casts
+            watermarks[row] = max(watermarks[row], watermark)
+
+    types = classify_counts(totals, min_signal)
+    changed: Dict[int, str] = {}
+    rows = []
+    for row, fid in enumerate(fids.tolist()):
+        personality_type = previous_types[row]
+        if types[row] >= 0:
+            personality_type = PERSONALITY_TYPES[types[row]]
+            if personality_type != previous_types[row]:
+                changed[fid] = personality_type
+        rows.append((fid, int(watermarks[row]), int(casts[row]), totals[row], personality_type))
+    state.save(rows)
+
+    store.put_many(changed)
+    if index is not None:
+        for fid, personality_type in changed.items():
+            index.add(fid, personality_type, PERSONALITY_PROFILES[personality_type])
+
+    return {
+        "shards": len(shards),
+        "new_casts": new_casts,
+        "skipped_untimestamped": untimestamped,
+        "active_fids": int(fids.size),
+        "changed": len(changed),
+        "seconds": round(time.perf_counter() - started, 2)
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="yeni JSONL cast dosyaları (.gz olabilir)")
+    parser.add_argument("--state", required=True, help="FID durum SQLite dosyası")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--shard-mb", type=int, default=64)
+    parser.add_argument("--min-signal", type=float, default=3.0)
+    parser.add_argument("--store-url", default=None, help="PROFILE_STORE_URL yerine")
+    args = parser.parse_args(argv)
+
+    store = ProfileStore(create_backend(args.store_url)) if args.store_url else None
+    stats = refresh(args.paths, FeatureState(args.state), store, workers=args.workers,
+                    shard_bytes=args.shard_mb * 1024 * 1024, min_signal=args.min_signal)
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
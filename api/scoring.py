@@ -0,0 +1,271 @@
+"""
+Batch Scoring Engine
+Aday özelliklerini contiguous numpy dizilerinde tutar ve tek geçişte skorlar
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from .personality import PERSONALITY_PROFILES, TYPE_INDEX, PersonalityAnalyzer
+
+MASK_BITS = 64
+
+# uint8 -> bit sayısı (numpy < 2.0 için popcount)
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class FeatureVocab:
+    """
+    Token/trait isimlerini bit pozisyonlarına eşler
+    Her isim kendi bitini alır (katlama yok: örtüşme sadece gerçek ortak isimden).
+    Maskeler Python int'i olduğu için sınırsızdır; numpy uint64 dizileri ancak
+    vocab MASK_BITS'e sığarken kullanılabilir (bkz. check_uint64)
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        self.bits: Dict[str, int] = {}
+        for name in names:
+            self.bit(name)
+
+    def bit(self, name: str) -> int:
+        position = self.bits.get(name)
+        if position is None:
+            position = self.bits[name] = len(self.bits)
+        return position
+
+    def mask(self, names: Iterable[str]) -> int:
+        value = 0
+        for name in names:
+            value |= 1 << self.bit(name)
+        return value
+
+
+TOKEN_VOCAB = FeatureVocab(
+    token for profile in PERSONALITY_PROFILES.values() for token in profile["token_preference"]
+)
+TRAIT_VOCAB = FeatureVocab(
+    trait for profile in PERSONALITY_PROFILES.values() for trait in profile["traits"]
+)
+
+
+def check_uint64() -> None:
+    """Vocab'lar uint64 maskeye sığmıyorsa ValueError (vektörel skorlama yanlış sonuç verirdi)"""
+    for label, vocab in (("token", TOKEN_VOCAB), ("trait", TRAIT_VOCAB)):
+        if len(vocab.bits) > MASK_BITS:
+            raise ValueError(f"{label} vocabulary has {len(vocab.bits)} names, "
+                             f"more than the {MASK_BITS} bits a uint64 mask can hold")
+
+
+def type_mask(personality_types: Iterable[str]) -> int:
+    """ideal_match/avoid listesini tip bitmask'ine çevirir"""
+    value = 0
+    for personality_type in personality_types:
+        index = TYPE_INDEX.get(personality_type)
+        if index is not None:
+            value |= 1 << index
+    return value
+
+
+class FeatureRecord:
+    """
+    Kullanıcı başına kompakt özellik kaydı (profil dict'i ve listeleri yerine)
+    Token/trait/ideal/avoid kümeleri int bitmask, risk ve tip küçük int;
+    örtüşme = AND'in popcount'u. Maskeler CandidatePool ile aynı vocab'tan gelir,
+    böylece tekil ve vektörel skorlama aynı sonucu verir.
+    """
+
+    __slots__ = ("token_mask", "trait_mask", "ideal_mask", "avoid_mask",
+                 "trait_count", "risk", "type_code")
+
+    def __init__(self, token_mask: int, trait_mask: int, ideal_mask: int, avoid_mask: int,
+                 trait_count: int, risk: int, type_code: int = -1):
+        self.token_mask = token_mask
+        self.trait_mask = trait_mask
+        self.ideal_mask = ideal_mask
+        self.avoid_mask = avoid_mask
+        self.trait_count = trait_count
+        self.risk = risk
+        self.type_code = type_code
+
+    @classmethod
+    def from_profile(cls, profile: Dict, personality_type: Optional[str] = None) -> "FeatureRecord":
+        return cls(
+            TOKEN_VOCAB.mask(profile["token_preference"]),
+            TRAIT_VOCAB.mask(profile["traits"]),
+            type_mask(profile.get("ideal_match", [])),
+            type_mask(profile.get("avoid", [])),
+            len(profile["traits"]),
+            int(profile["risk_tolerance"]),
+            TYPE_INDEX.get(personality_type, -1)
+        )
+
+    def token_overlap(self, other: "FeatureRecord") -> int:
+        return (self.token_mask & other.token_mask).bit_count()
+
+    def trait_overlap(self, other: "FeatureRecord") -> int:
+        return (self.trait_mask & other.trait_mask).bit_count()
+
+
+# Paylaşılan tip profilleri için kayıtlar bir kez kurulur
+_PROFILE_RECORDS = {
+    id(profile): FeatureRecord.from_profile(profile, personality_type)
+    for personality_type, profile in PERSONALITY_PROFILES.items()
+}
+
+
+def feature_record(profile: Dict) -> FeatureRecord:
+    """Profilin kaydı - PERSONALITY_PROFILES'tan geliyorsa hazır olan"""
+    record = _PROFILE_RECORDS.get(id(profile))
+    if record is None:
+        record = FeatureRecord.from_profile(profile)
+    return record
+
+
+def popcount(values: np.ndarray) -> np.ndarray:
+    """uint64 dizisi için bit sayısı"""
+    bitwise_count = getattr(np, "bitwise_count", None)
+    if bitwise_count is not None:
+        return bitwise_count(values)
+    as_bytes = np.ascontiguousarray(values, dtype=np.uint64).view(np.uint8)
+    return _POPCOUNT8[as_bytes].reshape(-1, 8).sum(axis=1)
+
+
+class CandidatePool:
+    """Adayların özellik dizileri (her alan bir numpy dizisi)"""
+
+    def __init__(self, fids: Sequence[int], profiles: Sequence[Dict],
+                 personality_types: Sequence[str]):
+        size = len(fids)
+        records = [feature_record(p) for p in profiles]
+        check_uint64()
+        self.fids = np.asarray(fids, dtype=np.int64)
+        self.type_codes = np.fromiter((TYPE_INDEX.get(t, -1) for t in personality_types),
+                                      dtype=np.int8, count=size)
+        self.risk = np.fromiter((r.risk for r in records), dtype=np.int16, count=size)
+        self.token_masks = np.fromiter((r.token_mask for r in records), dtype=np.uint64, count=size)
+        self.trait_masks = np.fromiter((r.trait_mask for r in records), dtype=np.uint64, count=size)
+        self.trait_counts = np.fromiter((r.trait_count for r in records), dtype=np.int16, count=size)
+        self.ideal_masks = np.fromiter((r.ideal_mask for r in records), dtype=np.uint64, count=size)
+        self.avoid_masks = np.fromiter((r.avoid_mask for r in records), dtype=np.uint64, count=size)
+        # Sonuç dict'leri için orijinal profiller (sadece kazananlar okunur)
+        self.profiles = list(profiles)
+        self.personality_types = list(personality_types)
+
+    @classmethod
+    def from_analyses(cls, analyses: Sequence[Dict]) -> "CandidatePool":
+        """analyze_from_fid çıktılarından havuz oluşturur"""
+        return cls(
+            [a["fid"] for a in analyses],
+            [a["profile"] for a in analyses],
+            [a["personality_type"] for a in analyses]
+        )
+
+    @classmethod
+    def from_types(cls, fids: Sequence[int], personality_types: Sequence[str]) -> "CandidatePool":
+        """Sadece FID + tip bilinen adaylar için"""
+        return cls(fids, [PERSONALITY_PROFILES[t] for t in personality_types], personality_types)
+
+    def __len__(self) -> int:
+        return len(self.fids)
+
+
+class BatchScorer:
+    """
+    PersonalityAnalyzer.calculate_compatibility'nin vektörel karşılığı
+    Aynı ağırlıklar ve eşikler; tüm havuz tek geçişte skorlanır
+    """
+
+    def __init__(self, analyzer: Optional[PersonalityAnalyzer] = None,
+                 rng: Optional[np.random.Generator] = None):
+        self.analyzer = analyzer or PersonalityAnalyzer()
+        self.rng = rng or np.random.default_rng()
+
+    def score(self, user_profile: Dict, pool: CandidatePool) -> Dict[str, np.ndarray]:
+        """Her aday için ağırlıklı bileşenler ve toplam skor (0-100)"""
+        user = feature_record(user_profile)
+        check_uint64()
+        
+        # Token preference compatibility (30%)
+        user_tokens = np.uint64(user.token_mask)
+        token = np.where((pool.token_masks & user_tokens) != 0, 0.9, 0.5) * 0.30
+
+        # Risk tolerance compatibility (25%)
+        diff = np.abs(pool.risk - user.risk)
+        risk = np.select([diff < 10, diff < 30], [1.0, 0.7], 0.4) * 0.25
+
+        # Trait compatibility (20%)
+        user_traits = np.uint64(user.trait_mask)
+        common = popcount(pool.trait_masks & user_traits)
+        trait = common / np.maximum(pool.trait_counts, user.trait_count) * 0.20
+
+        # Ideal match bonus (15%)
+        user_ideal = np.uint64(user.ideal_mask)
+        user_avoid = np.uint64(user.avoid_mask)
+        ideal = (pool.ideal_masks & user_ideal) != 0
+        avoid = (pool.avoid_masks & user_avoid) != 0
+        bonus = np.select([ideal, avoid], [1.0, 0.3], 0.6) * 0.15
+
+        # Community engagement (10%)
+        community = self.rng.uniform(0.7, 1.0, len(pool)) * 0.10
+
+        return {
+            "token": token,
+            "risk": risk,
+            "trait": trait,
+            "bonus": bonus,
+            "community": community,
+            "total": (token + risk + trait + bonus + community) * 100
+        }
+
+    @staticmethod
+    def expected_totals(scores: Dict[str, np.ndarray]) -> np.ndarray:
+        """Rastgele topluluk skoru yerine ortalaması (0.85) ile deterministik toplam"""
+        return scores["total"] + (0.85 * 0.10 - scores["community"]) * 100
+
+    def top_n(self, user_profile: Dict, pool: CandidatePool, n: int) -> List[Dict]:
+        """
+        En yüksek skorlu n adayı döner
+        Tam sıralama yerine argpartition; sadece kazananlar sıralanır
+        """
+        if n <= 0 or len(pool) == 0:
+            return []
+        return self.rank(pool, self.score(user_profile, pool), n)
+
+    def rank(self, pool: CandidatePool, scores: Dict[str, np.ndarray], n: int) -> List[Dict]:
+        """score() çıktısından top n sonuç dict'i"""
+        if n <= 0 or len(pool) == 0:
+            return []
+
+        totals = scores["total"]
+        if n < len(pool):
+            winners = np.argpartition(-totals, n - 1)[:n]
+        else:
+            winners = np.arange(len(pool))
+        winners = winners[np.argsort(-totals[winners], kind="stable")]
+
+        return [
+            {
+                "index": int(i),
+                "fid": int(pool.fids[i]),
+                "personality_type": pool.personality_types[i],
+                "profile": pool.profiles[i],
+                "compatibility": self._compatibility_dict(scores, i)
+            }
+            for i in winners
+        ]
+
+    def _compatibility_dict(self, scores: Dict[str, np.ndarray], i: int) -> Dict:
+        """calculate_compatibility ile aynı biçimde sonuç"""
+        total_score = float(scores["total"][i])
+        return {
+            "total_score": round(total_score, 1),
+            "breakdown": {
+                "token_preferences": round(float(scores["token"][i]) * 100 / 0.30, 1),
+                "risk_tolerance": round(float(scores["risk"][i]) * 100 / 0.25, 1),
+                "personality_traits": round(float(scores["trait"][i]) * 100 / 0.20, 1),
+                "ideal_match_factor": round(float(scores["bonus"][i]) * 100 / 0.15, 1),
+                "community_vibe": round(float(scores["community"][i]) * 100 / 0.10, 1)
+            },
+            "interpretation": self.analyzer._interpret_score(total_score)
+        }
@@ -0,0 +1,45 @@
+"""
+Single Flight
+Aynı anahtarla eşzamanlı gelen async çağrıları tek bir uçuşta birleştirir
+"""
+
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+import asyncio
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    İlk çağıran işi başlatır, aynı anahtarla gelen diğerleri aynı sonucu
+    (ya da aynı exception'ı) bekler. İş ayrı bir task'ta çalışır; bekleyenlerden
+    biri iptal edilse bile diğerleri için devam eder.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        loop = asyncio.get_running_loop()
+        task = self._inflight.get(key)
+        if task is not None and not task.done() and task.get_loop() is loop:
+            return await asyncio.shield(task)
+
+        task = loop.create_task(fn())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def __contains__(self, key: Hashable) -> bool:
+        task = self._inflight.get(key)
+        return task is not None and not task.done()
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Kimse beklemiyorsa "exception was never retrieved" uyarısı çıkmasın
+        if not task.cancelled():
+            task.exception()
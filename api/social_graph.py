@@ -0,0 +1,349 @@
+"""
+Social Graph
+Farcaster follow grafı için CSR (indptr/indices) deposu ve 2-hop aday üretimi
+
+Ingest (hub export yerine yerel edge-list dosyası, satır başına "takipçi takip_edilen"):
+    python -m api.social_graph ingest follows.txt data/graph
+    python -m api.social_graph candidates data/graph 1234 --limit 50
+"""
+
+from typing import Dict, Iterator, List, Optional, Tuple
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+META_FILE = "meta.json"
+INDPTR_FILE = "indptr.npy"
+INDICES_FILE = "indices.npy"
+
+# indices int32 memmap'e yazılır; daha büyük FID'ler taşar
+MAX_FID = np.iinfo(np.int32).max
+
+# Dosya bu boyutta bloklarla okunur; bellek kullanımı blok + O(max_fid)
+DEFAULT_CHUNK_BYTES = 64 * 1024 * 1024
+
+
+def _open(path: str):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def iter_edge_chunks(path: str, chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+                     stats: Optional[Dict] = None) -> Iterator[np.ndarray]:
+    """
+    Edge-list dosyasını (N, 2) int64 bloklar halinde okur
+    Ayraç boşluk/tab/virgül olabilir; '#' ile başlayan satırlar atlanır.
+    İki tamsayı alanı olmayan satırlar (başlık vb.) atlanır ve
+    stats["malformed_lines"] içinde sayılır.
+    """
+    carry = b""
+    with _open(path) as f:
+        while True:
+            block = f.read(chunk_bytes)
+            if not block and not carry:
+                return
+            data = carry + block
+            if block:
+                cut = data.rfind(b"\n") + 1
+                data, carry = data[:cut], data[cut:]
+            else:
+                carry = b""
+            if not data:
+                continue
+            if b"#" in data:
+                data = b"\n".join(line for line in data.split(b"\n")
+                                  if not line.lstrip().startswith(b"#"))
+            values, malformed = _parse_edges(data.replace(b",", b" "))
+            if malformed and stats is not None:
+                stats["malformed_lines"] = stats.get("malformed_lines", 0) + malformed
+            if values.size:
+                yield values.reshape(-1, 2)
+
+
+# Alan ayracı sayılan baytlar (newline hariç)
+_BLANK = np.zeros(256, dtype=bool)
+_BLANK[[ord(" "), ord("\t"), ord("\r"), 0x0B, 0x0C]] = True
+
+
+def _count_fields(data: bytes) -> Tuple[bool, int]:
+    """
+    Satır başına alan sayısı (vektörel): her satır boş veya tam iki alanlı mı,
+    toplam alan sayısı
+    """
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if raw.size == 0:
+        return True, 0
+    newline = raw == ord("\n")
+    blank = _BLANK[raw] | newline
+    starts = ~blank & np.r_[True, blank[:-1]]
+    line_ids = np.cumsum(newline)
+    per_line = np.bincount(line_ids[starts], minlength=int(line_ids[-1]) + 1)
+    return bool(np.all((per_line == 0) | (per_line == 2))), int(starts.sum())
+
+
+def _parse_edges(data: bytes) -> Tuple[np.ndarray, int]:
+    """
+    Blok -> düz int64 dizi + atlanan satır sayısı
+    Hızlı yol tek np.fromstring; her dolu satırda tam iki alan yoksa
+    (bozuk satır) satır satır ayrıştırılır
+    """
+    fields_ok, num_fields = _count_fields(data)
+    if fields_ok:
+        try:
+            values = np.fromstring(data, dtype=np.int64, sep=" ")
+            if values.size == num_fields:
+                return values, 0
+        except ValueError:
+            pass
+
+    parsed: List[int] = []
+    malformed = 0
+    for line in data.split(b"\n"):
+        fields = line.split()
+        if not fields:
+            continue
+        try:
+            if len(fields) != 2:
+                raise ValueError
+            parsed.extend((int(fields[0]), int(fields[1])))
+        except ValueError:
+            malformed += 1
+    return np.array(parsed, dtype=np.int64), malformed
+
+
+def ingest_edge_list(path: str, out_dir: str, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> Dict:
+    """
+    Edge-list dosyasını CSR'a çevirir (iki geçiş, sınırlı bellek)
+
+    1. geçiş: FID başına out-degree (bincount) -> indptr
+    2. geçiş: komşular diskteki memmap'e yazılır
+    Son adım: her satır sıralanır, tekrar eden kenarlar ve self-loop'lar atılır.
+    indptr FID ile doğrudan indekslenir (Farcaster FID'leri yoğun ve küçük).
+    """
+    started = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+
+    # 1. geçiş: derece sayımı
+    counts = np.zeros(0, dtype=np.int64)
+    raw_edges = 0
+    parse_stats: Dict = {}
+    for edges in iter_edge_chunks(path, chunk_bytes, parse_stats):
+        if edges.min() < 0:
+            raise ValueError(f"{path}: negative fid")
+        src, dst = edges[:, 0], edges[:, 1]
+        keep = src != dst
+        src = src[keep]
+        largest = int(max(src.max(initial=0), dst.max(initial=0)))
+        if largest > MAX_FID:
+            raise ValueError(f"{path}: fid {largest} exceeds {MAX_FID} "
+                             f"(int32 indices, indptr sized by max fid)")
+        needed = largest + 1
+        if needed > counts.size:
+            counts = np.concatenate([counts, np.zeros(needed - counts.size, dtype=np.int64)])
+        counts += np.bincount(src, minlength=counts.size)
+        raw_edges += edges.shape[0]
+
+    num_nodes = counts.size
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    total = int(indptr[-1])
+
+    # 2. geçiş: komşuları yerlerine yaz (diskte, RAM'de değil)
+    tmp_path = os.path.join(out_dir, INDICES_FILE + ".tmp")
+    scratch = np.memmap(tmp_path, dtype=np.int32, mode="w+", shape=(max(total, 1),))
+    cursor = indptr[:-1].copy()
+    for edges in iter_edge_chunks(path, chunk_bytes):
+        edges = edges[edges[:, 0] != edges[:, 1]]
+        if edges.size == 0:
+            continue
+        order = np.argsort(edges[:, 0], kind="stable")
+        src, dst = edges[order, 0], edges[order, 1]
+        # Blok içinde aynı kaynağın kaçıncı kenarı olduğu
+        starts = np.flatnonzero(np.r_[True, src[1:] != src[:-1]])
+        group_sizes = np.diff(np.r_[starts, src.size])
+        rank = np.arange(src.size) - np.repeat(starts, group_sizes)
+        scratch[cursor[src] + rank] = dst
+        cursor[src[starts]] += group_sizes
+
+    # Satırları sırala + tekrarları at; yazma ucu okuma ucunun gerisinde kalır
+    new_indptr = np.zeros_like(indptr)
+    write = 0
+    rows_per_block = _rows_per_block(indptr, chunk_bytes // 8)
+    for first in range(0, num_nodes, rows_per_block):
+        last = min(first + rows_per_block, num_nodes)
+        lo, hi = int(indptr[first]), int(indptr[last])
+        if lo == hi:
+            new_indptr[first + 1:last + 1] = write
+            continue
+        block = np.array(scratch[lo:hi])
+        rows = np.repeat(np.arange(first, last), np.diff(indptr[first:last + 1]))
+        order = np.lexsort((block, rows))
+        block, rows = block[order], rows[order]
+        unique = np.r_[True, (block[1:] != block[:-1]) | (rows[1:] != rows[:-1])]
+        block, rows = block[unique], rows[unique]
+        scratch[write:write + block.size] = block
+        row_counts = np.bincount(rows - first, minlength=last - first)
+        new_indptr[first + 1:last + 1] = write + np.cumsum(row_counts)
+        write += block.size
+
+    indices = np.lib.format.open_memmap(os.path.join(out_dir, INDICES_FILE), mode="w+",
+                                        dtype=np.int32, shape=(write,))
+    step = max(1, chunk_bytes // 4)
+    for offset in range(0, write, step):
+        end = min(offset + step, write)
+        indices[offset:end] = scratch[offset:end]
+    indices.flush()
+    del indices, scratch
+    os.remove(tmp_path)
+    np.save(os.path.join(out_dir, INDPTR_FILE), new_indptr)
+
+    meta = {
+        "source": os.path.abspath(path),
+        "nodes": num_nodes,
+        "edges": write,
+        "raw_edges": raw_edges,
+        "malformed_lines": parse_stats.get("malformed_lines", 0),
+        "ingest_seconds": round(time.perf_counter() - started, 2)
+    }
+    with open(os.path.join(out_dir, META_FILE), "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def _rows_per_block(indptr: np.ndarray, max_edges: int) -> int:
+    """Ortalama dereceye göre, bloğun ~max_edges kenar içereceği satır sayısı"""
+    nodes = indptr.size - 1
+    if nodes == 0 or indptr[-1] == 0:
+        return max(nodes, 1)
+    average = indptr[-1] / nodes
+    return max(1, int(max_edges / max(average, 1.0)))
+
+
+class SocialGraph:
+    """
+    Salt okunur CSR follow grafı
+    following(fid) = indices[indptr[fid]:indptr[fid + 1]] (sıralı, tekrarsız)
+    """
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, meta: Optional[Dict] = None):
+        self.indptr = indptr
+        self.indices = indices
+        self.meta = meta or {}
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "SocialGraph":
+        """indices memory-map edilir; sayfalar ancak dokunulunca RAM'e gelir"""
+        mode = "r" if mmap else None
+        meta = {}
+        meta_path = os.path.join(directory, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+        return cls(
+            np.load(os.path.join(directory, INDPTR_FILE)),
+            np.load(os.path.join(directory, INDICES_FILE), mmap_mode=mode),
+            meta
+        )
+
+    @property
+    def num_nodes(self) -> int:
+        return self.indptr.size - 1
+
+    @property
+    def num_edges(self) -> int:
+        return int(self.indptr[-1])
+
+    def degree(self, fid: int) -> int:
+        if not 0 <= fid < self.num_nodes:
+            return 0
+        return int(self.indptr[fid + 1] - self.indptr[fid])
+
+    def following(self, fid: int) -> np.ndarray:
+        if not 0 <= fid < self.num_nodes:
+            return np.zeros(0, dtype=np.int32)
+        return self.indices[self.indptr[fid]:self.indptr[fid + 1]]
+
+    def two_hop(self, fid: int, limit: int = 200, max_first_hop: int = 200,
+                max_per_neighbor: int = 200, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+        """
+        Arkadaşın arkadaşları: fid'in takip ettiklerinin takip ettikleri
+        Kendisi ve zaten takip ettikleri çıkarılır, tekrarlar birleştirilir ve
+        adaylar ortak bağlantı sayısına göre sıralanır. Derece sınırları
+        (max_first_hop, max_per_neighbor) hub hesapların maliyeti patlatmasını önler;
+        sınırı aşan listelerden rastgele örnek alınır.
+        """
+        rng = rng or np.random.default_rng()
+        first_hop = np.asarray(self.following(fid))
+        if first_hop.size == 0:
+            return np.zeros(0, dtype=np.int64)
+        if first_hop.size > max_first_hop:
+            sampled = rng.choice(first_hop, size=max_first_hop, replace=False)
+        else:
+            sampled = first_hop
+
+        parts = []
+        for neighbor in sampled:
+            start, end = int(self.indptr[neighbor]), int(self.indptr[neighbor + 1])
+            if end - start > max_per_neighbor:
+                # Rastgele pencere: sıralı listeden ardışık dilim (memmap'te tek okuma)
+                start += int(rng.integers(0, end - start - max_per_neighbor + 1))
+                end = start + max_per_neighbor
+            parts.append(self.indices[start:end])
+        if not parts:
+            return np.zeros(0, dtype=np.int64)
+
+        reached = np.concatenate(parts)
+        candidates, mutuals = np.unique(reached, return_counts=True)
+        keep = ~np.isin(candidates, first_hop, assume_unique=True) & (candidates != fid)
+        candidates, mutuals = candidates[keep], mutuals[keep]
+        if candidates.size > limit:
+            top = np.argpartition(-mutuals, limit - 1)[:limit]
+            candidates, mutuals = candidates[top], mutuals[top]
+        order = np.lexsort((candidates, -mutuals))
+        return candidates[order].astype(np.int64)
+
+
+def load_social_graph(directory: Optional[str]) -> Optional[SocialGraph]:
+    """SOCIAL_GRAPH_PATH gibi opsiyonel ayarlar için: yol yoksa None"""
+    if not directory or not os.path.exists(os.path.join(directory, INDPTR_FILE)):
+        return None
+    return SocialGraph.load(directory)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="edge-list dosyasından CSR oluştur")
+    ingest.add_argument("edges", help="satır başına 'takipçi takip_edilen' (.gz olabilir)")
+    ingest.add_argument("out_dir")
+    ingest.add_argument("--chunk-mb", type=int, default=DEFAULT_CHUNK_BYTES // (1024 * 1024))
+
+    candidates = commands.add_parser("candidates", help="bir FID için 2-hop adaylar")
+    candidates.add_argument("graph_dir")
+    candidates.add_argument("fid", type=int)
+    candidates.add_argument("--limit", type=int, default=50)
+    candidates.add_argument("--max-first-hop", type=int, default=200)
+    candidates.add_argument("--max-per-neighbor", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    if args.command == "ingest":
+        meta = ingest_edge_list(args.edges, args.out_dir, args.chunk_mb * 1024 * 1024)
+        print(json.dumps(meta, indent=2))
+        return 0
+
+    graph = SocialGraph.load(args.graph_dir)
+    started = time.perf_counter()
+    result = graph.two_hop(args.fid, args.limit, args.max_first_hop, args.max_per_neighbor)
+    elapsed = (time.perf_counter() - started) * 1000
+    print(json.dumps({"fid": args.fid, "following": graph.degree(args.fid),
+                      "candidates": result.tolist(), "ms": round(elapsed, 2)}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
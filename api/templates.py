@@ -0,0 +1,109 @@
+"""
+Frame Templates
+HTML şablonlarını bir kez derler; statik frame'leri sıkıştırılmış byte olarak tutar
+"""
+
+from typing import Dict, List, Optional, Tuple
+import gzip
+import hashlib
+import re
+
+try:
+    import brotli
+except ImportError:  # brotli opsiyonel - yoksa sadece gzip
+    brotli = None
+
+_FIELD = re.compile(r"\{\{(\w+)\}\}")
+
+
+class FrameTemplate:
+    """
+    {{alan}} yer tutuculu şablon
+    Sabitler (ör. app_url) derleme sırasında gömülür; render sadece
+    dinamik alanları statik parçalar arasına yerleştirir.
+    """
+
+    def __init__(self, source: str, **constants: str):
+        pieces = _FIELD.split(source)
+        self._static: List[str] = [pieces[0]]
+        self.fields: List[str] = []
+        for index in range(1, len(pieces), 2):
+            name, text = pieces[index], pieces[index + 1]
+            if name in constants:
+                self._static[-1] += str(constants[name]) + text
+            else:
+                self.fields.append(name)
+                self._static.append(text)
+
+    def render(self, **values) -> str:
+        parts = [self._static[0]]
+        for name, text in zip(self.fields, self._static[1:]):
+            parts.append(str(values[name]))
+            parts.append(text)
+        return "".join(parts)
+
+
+class StaticAsset:
+    """
+    Önceden encode edilmiş gövde + gzip/brotli varyantları ve varyant başına ETag
+    Her istekte sadece Accept-Encoding'e göre hazır byte seçilir.
+    """
+
+    # Aynı içerik farklı byte'lar: her encoding kendi ETag'ini alır
+    _ETAG_SUFFIX = {"gzip": "-gz", "br": "-br"}
+
+    def __init__(self, content: str, media_type: str = "text/html; charset=utf-8"):
+        self.text = content
+        self.media_type = media_type
+        self.body = content.encode("utf-8")
+        self.etag = '"%s"' % hashlib.sha1(self.body).hexdigest()[:16]
+        self.encodings: Dict[str, bytes] = {"gzip": gzip.compress(self.body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            self.encodings["br"] = brotli.compress(self.body, quality=11)
+        self.etags: Dict[Optional[str], str] = {None: self.etag}
+        for encoding in self.encodings:
+            self.etags[encoding] = self.etag[:-1] + self._ETAG_SUFFIX[encoding] + '"'
+
+    def select(self, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """İstemcinin kabul ettiği en iyi varyant: (gövde, content-encoding)"""
+        accepted = _parse_accept_encoding(accept_encoding or "")
+        for encoding in ("br", "gzip"):
+            if encoding in self.encodings and accepted.get(encoding, accepted.get("*", 0)) > 0:
+                return self.encodings[encoding], encoding
+        return self.body, None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match başlığı bu ETag'i kapsıyor mu
+    Liste ("a", "b"), "*" ve zayıf W/ etiketleri desteklenir (zayıf karşılaştırma)
+    """
+    if not if_none_match:
+        return False
+    target = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == target:
+            return True
+    return False
+
+
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    accepted: Dict[str, float] = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    return accepted
@@ -0,0 +1,209 @@
+"""
+User Resolver
+FID -> Farcaster kullanıcı bilgisi (username, görünen ad, avatar)
+İstekteki FID'ler toplanır, cache'de olmayanlar sınırlı boyutlu bulk isteklerle
+paylaşılan (pooled) HTTP client üzerinden çözülür; sonuçlar TTL ile, bulunamayan
+FID'ler daha kısa TTL ile (negatif cache) saklanır.
+
+API: Neynar uyumlu bulk endpoint
+    GET {FARCASTER_API_URL}/v2/farcaster/user/bulk?fids=1,2,3
+    -> {"users": [{"fid", "username", "display_name", "pfp_url"}, ...]}
+"""
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import time
+
+from .metrics import CACHE_LOOKUPS, USER_LOOKUP_BATCHES
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+BULK_PATH = "/v2/farcaster/user/bulk"
+DEFAULT_API_URL = "https://api.neynar.com"
+
+
+class UserResolver:
+    """
+    Toplu, cache'li Farcaster kullanıcı çözücü
+
+    Aynı anda istenen ve henüz yolda olan FID'ler için ikinci istek atılmaz;
+    bekleyen sonuca katılınır. Upstream hatası negatif cache'e yazılmaz, o FID'ler
+    için sonuç boş döner (çağıran fallback username kullanır).
+    """
+
+    def __init__(self, base_url: str, api_key: Optional[str] = None, batch_size: int = 100,
+                 ttl: float = 3600, negative_ttl: float = 300, timeout: float = 2.0,
+                 max_connections: int = 20, max_entries: int = 100_000):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.batch_size = max(1, batch_size)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_entries = max_entries
+        # fid -> (bitiş zamanı, kullanıcı bilgisi veya negatif kayıt için None)
+        self._cache: "OrderedDict[int, Tuple[float, Optional[Dict]]]" = OrderedDict()
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> "httpx.AsyncClient":
+        """
+        Tek, pooled AsyncClient (keep-alive bağlantılar istekler arasında paylaşılır)
+        httpx import'u ilk kullanıma ertelenir; bağlantılar loop'a bağlı olduğu için
+        loop değişirse client yeniden kurulur
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            import httpx
+            headers = {"accept": "application/json"}
+            if self.api_key:
+                headers["api_key"] = self.api_key
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=headers,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections)
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def resolve_many(self, fids: Iterable[int]) -> Dict[int, Dict]:
+        """
+        fid -> kullanıcı bilgisi; bulunamayan veya çözülemeyen FID'ler sonuçta yok
+        Cache'de olmayan FID'ler batch_size'lık parçalarla paralel istenir
+        """
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        result: Dict[int, Dict] = {}
+        waiting: Dict[int, asyncio.Future] = {}
+        missing: List[int] = []
+
+        for fid in dict.fromkeys(fids):
+            entry = self._cache.get(fid)
+            if entry is not None and entry[0] > now:
+                self._cache.move_to_end(fid)
+                CACHE_LOOKUPS.inc(cache="farcaster_users", result="hit")
+                if entry[1] is not None:
+                    result[fid] = entry[1]
+                continue
+            CACHE_LOOKUPS.inc(cache="farcaster_users", result="miss")
+            pending = self._pending.get(fid)
+            if pending is not None and pending.get_loop() is loop:
+                waiting[fid] = pending
+            else:
+                waiting[fid] = self._pending[fid] = loop.create_future()
+                missing.append(fid)
+
+        if missing:
+            batches = [missing[start:start + self.batch_size]
+                       for start in range(0, len(missing), self.batch_size)]
+            try:
+                await asyncio.gather(*[self._resolve_batch(batch) for batch in batches])
+            finally:
+                # İptal edildiysek bu FID'leri bekleyen diğer istekler asılı kalmasın
+                for fid in missing:
+                    future = self._pending.get(fid)
+                    if future is waiting[fid]:
+                        del self._pending[fid]
+                        if not future.done():
+                            future.set_result(None)
+
+        for fid, future in waiting.items():
+            user = await future
+            if user is not None:
+                result[fid] = user
+        return result
+
+    async def _resolve_batch(self, fids: List[int]) -> None:
+        """Tek bulk istek; bekleyen future'ları her durumda sonuçlandırır"""
+        users: Dict[int, Dict] = {}
+        try:
+            users = await self._fetch(fids)
+            USER_LOOKUP_BATCHES.inc(outcome="ok")
+            failed = False
+        except Exception as e:
+            USER_LOOKUP_BATCHES.inc(outcome="error")
+            logger.warning("Farcaster user lookup failed for %d fids: %s", len(fids), e)
+            failed = True
+
+        now = time.monotonic()
+        for fid in fids:
+            user = users.get(fid)
+            if not failed:
+                ttl = self.ttl if user is not None else self.negative_ttl
+                self._cache[fid] = (now + ttl, user)
+                self._cache.move_to_end(fid)
+            future = self._pending.pop(fid, None)
+            if future is not None and not future.done():
+                future.set_result(user)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    async def _fetch(self, fids: List[int]) -> Dict[int, Dict]:
+        response = await self._get_client().get(
+            BULK_PATH, params={"fids": ",".join(str(fid) for fid in fids)}
+        )
+        response.raise_for_status()
+        users = {}
+        for user in response.json().get("users", []):
+            fid = int(user["fid"])
+            users[fid] = {
+                "fid": fid,
+                "username": user.get("username"),
+                "display_name": user.get("display_name"),
+                "pfp_url": user.get("pfp_url")
+            }
+        return users
+
+    async def apply(self, matches: List[Dict]) -> List[Dict]:
+        """Eşleşme sözlüklerine gerçek username/display_name/pfp_url yazar (tek tur)"""
+        users = await self.resolve_many(match["fid"] for match in matches)
+        for match in matches:
+            user = users.get(match["fid"])
+            if user is None or not user["username"]:
+                continue
+            match["username"] = f"@{user['username']}"
+            match["display_name"] = user["display_name"]
+            match["pfp_url"] = user["pfp_url"]
+        return matches
+
+    def stats(self) -> Dict:
+        now = time.monotonic()
+        live = [value for expires_at, value in self._cache.values() if expires_at > now]
+        return {
+            "cached": len(live),
+            "negative": sum(1 for value in live if value is None),
+            "pending": len(self._pending)
+        }
+
+
+def create_user_resolver() -> Optional[UserResolver]:
+    """
+    FARCASTER_API_URL veya NEYNAR_API_KEY yoksa None: username'ler @user{fid} kalır
+    """
+    api_key = os.getenv("NEYNAR_API_KEY")
+    base_url = os.getenv("FARCASTER_API_URL") or (DEFAULT_API_URL if api_key else None)
+    if not base_url:
+        return None
+    return UserResolver(
+        base_url,
+        api_key=api_key,
+        batch_size=int(os.getenv("FARCASTER_BATCH_SIZE", "100")),
+        ttl=float(os.getenv("FARCASTER_USER_TTL", "3600")),
+        negative_ttl=float(os.getenv("FARCASTER_NEGATIVE_TTL", "300")),
+        timeout=float(os.getenv("FARCASTER_TIMEOUT", "2.0"))
+    )
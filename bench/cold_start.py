@@ -0,0 +1,128 @@
+"""
+Cold Start Budget
+Serverless cold start'ı taklit eder: her ölçüm temiz bir Python sürecinde
+api.main import süresini ve ilk isteklerin gecikmesini ölçer, bütçeyle karşılaştırır
+
+Kullanım (repo kökünden):
+    python -m bench.cold_start                          # 5 süreç, medyan, bütçe kontrolü
+    python -m bench.cold_start --runs 10 --import-budget-ms 1500
+    python -m bench.cold_start --importtime             # en yavaş import edilen modüller
+"""
+
+from typing import Dict, List
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Çocuk süreçte çalışan ölçüm; sonuç tek satır JSON olarak stdout'a yazılır
+_PROBE = r"""
+import asyncio, json, time
+started = time.perf_counter()
+import api.main
+import_ms = (time.perf_counter() - started) * 1000
+
+async def first_requests():
+    import httpx
+    app = api.main.app
+    timings = {}
+    await app.router.startup()
+    async with httpx.AsyncClient(app=app, base_url="http://cold") as client:
+        for name, method, path, body in [
+            ("GET /", "GET", "/", None),
+            ("POST /api/frame/analyze", "POST", "/api/frame/analyze", {"untrustedData": {"fid": 4242}}),
+            ("POST /api/frame/matches", "POST", "/api/frame/matches", {"untrustedData": {"fid": 4242}}),
+        ]:
+            t = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            timings[name] = round((time.perf_counter() - t) * 1000, 2)
+            if response.status_code >= 400:
+                timings[name + " status"] = response.status_code
+    return timings
+
+requests = asyncio.run(first_requests())
+print(json.dumps({"import_ms": round(import_ms, 2), "first_request_ms": requests}))
+"""
+
+
+def _child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = REPO_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    env.setdefault("OPENAI_API_KEY", "cold-start")
+    # Arka plan LLM işleri ağa çıkmasın: kapalı port, anında bağlantı hatası
+    env.setdefault("OPENAI_BASE_URL", "http://127.0.0.1:9/v1")
+    return env
+
+
+def measure_once() -> Dict:
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=REPO_ROOT, env=_child_env(), capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(limit: int = 15) -> List[Dict]:
+    """python -X importtime çıktısından kümülatif süresi en yüksek modüller"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import api.main"],
+        cwd=REPO_ROOT, env=_child_env(), capture_output=True, text=True, check=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time:  self [us] | cumulative | module"
+        self_us, cumulative_us, module = line.split(":", 1)[1].split("|")
+        rows.append({
+            "module": module.strip(),
+            "self_ms": round(int(self_us) / 1000, 1),
+            "cumulative_ms": round(int(cumulative_us) / 1000, 1)
+        })
+    rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+    return rows[:limit]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="temiz süreç sayısı (medyan alınır)")
+    parser.add_argument("--import-budget-ms", type=float,
+                        default=float(os.getenv("COLD_START_IMPORT_BUDGET_MS", "2000")))
+    parser.add_argument("--first-request-budget-ms", type=float,
+                        default=float(os.getenv("COLD_START_REQUEST_BUDGET_MS", "500")),
+                        help="her endpoint'in ilk isteği için bütçe")
+    parser.add_argument("--importtime", action="store_true", help="en yavaş import'ları listele")
+    args = parser.parse_args(argv)
+
+    runs = [measure_once() for _ in range(args.runs)]
+    import_ms = statistics.median(run["import_ms"] for run in runs)
+    first_request_ms = {
+        name: statistics.median(run["first_request_ms"][name] for run in runs)
+        for name in runs[0]["first_request_ms"] if not name.endswith(" status")
+    }
+
+    over_budget = []
+    print(f"{'import api.main':42} {import_ms:>9.1f}ms  (budget {args.import_budget_ms:.0f}ms)")
+    if import_ms > args.import_budget_ms:
+        over_budget.append(f"import api.main: {import_ms:.1f}ms > {args.import_budget_ms:.0f}ms")
+    for name, elapsed in first_request_ms.items():
+        print(f"{'first ' + name:42} {elapsed:>9.1f}ms  (budget {args.first_request_budget_ms:.0f}ms)")
+        if elapsed > args.first_request_budget_ms:
+            over_budget.append(f"first {name}: {elapsed:.1f}ms > {args.first_request_budget_ms:.0f}ms")
+
+    if args.importtime:
+        print(f"\n{'module':50} {'self':>9} {'cumulative':>11}")
+        for row in slowest_imports():
+            print(f"{row['module']:50} {row['self_ms']:>7.1f}ms {row['cumulative_ms']:>9.1f}ms")
+
+    for line in over_budget:
+        print(f"OVER BUDGET {line}")
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
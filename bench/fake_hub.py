@@ -0,0 +1,54 @@
+"""
+Fake Farcaster Hub
+Benchmark için yerel Neynar uyumlu kullanıcı API'si stand-in'i
+"""
+
+from typing import List
+import asyncio
+
+from aiohttp import web
+
+from .fake_openai import FakeOpenAIServer
+
+
+class FakeHubServer(FakeOpenAIServer):
+    """
+    GET /v2/farcaster/user/bulk?fids=1,2,3 taklidi
+    missing_every'ye bölünen FID'ler "kayıtlı değil" (yanıtta yok); istek başına
+    max_batch'ten fazla FID 400 döner. Her isteğin FID listesi requests'te tutulur.
+    """
+
+    def __init__(self, latency: float = 0.05, max_batch: int = 100, missing_every: int = 17,
+                 port: int = 0):
+        super().__init__(latency=latency, jitter=0.0, port=port)
+        self.max_batch = max_batch
+        self.missing_every = missing_every
+        self.requests: List[List[int]] = []
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def _add_routes(self, app: web.Application) -> None:
+        app.router.add_get("/v2/farcaster/user/bulk", self._bulk)
+
+    async def _bulk(self, request: web.Request) -> web.Response:
+        fids = [int(fid) for fid in request.query.get("fids", "").split(",") if fid]
+        self.calls += 1
+        self.requests.append(fids)
+        await asyncio.sleep(self.latency)
+
+        if not fids or len(fids) > self.max_batch:
+            self.failures += 1
+            return web.json_response({"message": f"fids must contain 1-{self.max_batch} values"},
+                                     status=400)
+
+        return web.json_response({"users": [
+            {
+                "fid": fid,
+                "username": f"caster{fid}",
+                "display_name": f"Caster {fid}",
+                "pfp_url": f"https://example.invalid/pfp/{fid}.png"
+            }
+            for fid in fids if fid % self.missing_every
+        ]})
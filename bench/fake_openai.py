@@ -0,0 +1,130 @@
+"""
+Fake OpenAI Server
+Benchmark için yerel OpenAI stand-in'i (gecikme ve hata oranı ayarlanabilir)
+"""
+
+from typing import Optional
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+
+from aiohttp import web
+
+
+class FakeOpenAIServer:
+    """
+    /v1/chat/completions taklidi
+    Her çağrı latency ± jitter bekler; failure_rate olasılıkla 500 döner
+    """
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.1, failure_rate: float = 0.0,
+                 port: int = 0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.port = port
+        self.calls = 0
+        self.failures = 0
+        self._rng = random.Random(seed)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        """Ayrı thread'de kendi event loop'u ile başlatır"""
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self) -> None:
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _serve(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        app = web.Application()
+        self._add_routes(app)
+        self._runner = web.AppRunner(app, access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, "127.0.0.1", self.port)
+        self._loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    def _add_routes(self, app: web.Application) -> None:
+        app.router.add_post("/v1/chat/completions", self._completions)
+
+    async def _completions(self, request: web.Request) -> web.StreamResponse:
+        payload = await request.json()
+        self.calls += 1
+        await asyncio.sleep(max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter)))
+
+        if self._rng.random() < self.failure_rate:
+            self.failures += 1
+            return web.json_response(
+                {"error": {"message": "fake upstream failure", "type": "server_error"}},
+                status=500
+            )
+
+        content = self._content(payload)
+        if payload.get("stream"):
+            return await self._stream(request, content)
+
+        return web.json_response({
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "gpt-4"),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content}
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        })
+
+    async def _stream(self, request: web.Request, content: str) -> web.StreamResponse:
+        """stream=True: SSE chunk'ları (kelime kelime)"""
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for word in content.split(" "):
+            chunk = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": "gpt-4",
+                "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            await asyncio.sleep(0.01)
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+    def _content(self, payload) -> str:
+        prompt = payload["messages"][-1]["content"]
+        if '"yorumlar"' in prompt:
+            # Batch yorum isteği: adaylar "#n:" satırlarıyla gelir
+            ids = [int(n) for n in re.findall(r"^#(\d+):", prompt, re.MULTILINE)]
+            return json.dumps({"yorumlar": [
+                {"id": n, "yorum": f"Fake GPT-4 yorumu #{self.calls}.{n} - WAGMI 🚀"} for n in ids
+            ]}, ensure_ascii=False)
+        return f"Fake GPT-4 yorumu #{self.calls} - WAGMI 🚀"
@@ -0,0 +1,175 @@
+"""
+Endpoint Latency Benchmark
+FastAPI app'i in-process ASGI client ile sahte OpenAI sunucusuna karşı ölçer
+
+Kullanım (repo kökünden):
+    python -m bench.run                                 # ölç ve baseline ile karşılaştır
+    python -m bench.run --save-baseline                 # sonucu baseline olarak kaydet
+    python -m bench.run --latency 1.0 --failure-rate 0.2 --concurrency 1,16,64
+"""
+
+from typing import Dict, List
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+from .fake_openai import FakeOpenAIServer
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def _endpoints():
+    """(ad, method, path üretici, body üretici)"""
+    def fid():
+        return random.randint(1000, 99999)
+
+    return [
+        ("GET /", "GET", lambda: "/", None),
+        ("POST /api/frame/analyze", "POST", lambda: "/api/frame/analyze",
+         lambda: {"untrustedData": {"fid": fid()}}),
+        ("POST /api/frame/matches", "POST", lambda: "/api/frame/matches",
+         lambda: {"untrustedData": {"fid": fid()}}),
+        ("GET /api/compatibility/{fid1}/{fid2}", "GET",
+         lambda: f"/api/compatibility/{fid()}/{fid()}", None),
+    ]
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+async def _measure(client, method: str, path, body, requests: int, concurrency: int) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await client.request(method, path(), json=body() if body else None)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0
+    }
+
+
+async def run_benchmark(concurrency_levels: List[int], requests: int) -> Dict:
+    import httpx
+    from api.main import app
+
+    await app.router.startup()
+    results: Dict[str, Dict[str, Dict]] = {}
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+            for name, method, path, body in _endpoints():
+                # Isınma (import, lazy init, ilk cache dolumu)
+                await _measure(client, method, path, body, 5, 1)
+                results[name] = {}
+                for concurrency in concurrency_levels:
+                    results[name][str(concurrency)] = await _measure(
+                        client, method, path, body, requests, concurrency
+                    )
+    finally:
+        await app.router.shutdown()
+    return results
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """p95 veya throughput tolerance'tan fazla kötüleştiyse regresyon listesi"""
+    regressions = []
+    for name, levels in results.items():
+        for concurrency, current in levels.items():
+            previous = baseline.get(name, {}).get(concurrency)
+            if not previous:
+                continue
+            if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{name} c={concurrency}: p95 "
+                                   f"{previous['p95_ms']} -> {current['p95_ms']} ms")
+            if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+                regressions.append(f"{name} c={concurrency}: throughput "
+                                   f"{previous['throughput_rps']} -> {current['throughput_rps']} rps")
+    return regressions
+
+
+def print_table(results: Dict, baseline: Dict) -> None:
+    print(f"{'endpoint':42} {'c':>4} {'p50':>9} {'p95':>9} {'p99':>9} {'rps':>8} {'err':>5}  vs baseline p95")
+    for name, levels in results.items():
+        for concurrency, r in levels.items():
+            previous = baseline.get(name, {}).get(concurrency)
+            delta = ""
+            if previous and previous["p95_ms"]:
+                delta = f"{(r['p95_ms'] / previous['p95_ms'] - 1) * 100:+.0f}%"
+            print(f"{name:42} {concurrency:>4} {r['p50_ms']:>8}ms {r['p95_ms']:>8}ms "
+                  f"{r['p99_ms']:>8}ms {r['throughput_rps']:>8} {r['errors']:>5}  {delta}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,8,32", help="virgülle ayrılmış eşzamanlılık seviyeleri")
+    parser.add_argument("--requests", type=int, default=200, help="seviye başına istek sayısı")
+    parser.add_argument("--latency", type=float, default=0.5, help="sahte OpenAI gecikmesi (sn)")
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="baseline'a göre izin verilen kötüleşme oranı")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    levels = [int(level) for level in args.concurrency.split(",") if level]
+
+    with FakeOpenAIServer(args.latency, args.jitter, args.failure_rate, seed=args.seed) as server:
+        # app import edilmeden önce: client sahte sunucuya gitsin
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "bench")
+        results = asyncio.run(run_benchmark(levels, args.requests))
+        upstream = {"calls": server.calls, "failures": server.failures}
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("results", {})
+
+    print_table(results, baseline)
+    print(f"\nupstream OpenAI calls: {upstream['calls']} (failures: {upstream['failures']})")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "config": {k: v for k, v in vars(args).items() if k not in ("baseline", "save_baseline")},
+                "results": results
+            }, f, indent=2)
+        print(f"baseline saved: {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Farcaster User Lookup Budget
+Sahte hub'a karşı UserResolver'ın upstream tur sayısını ölçer:
+matches sayfası başına en fazla bir bulk istek, batch boyutu sınırı,
+eşzamanlı isteklerin birleşmesi ve negatif cache
+
+Kullanım (repo kökünden):
+    python -m bench.user_lookups
+    python -m bench.user_lookups --pages 50 --batch-size 25 --latency 0.1
+"""
+
+from typing import Dict, List
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+from .fake_hub import FakeHubServer
+
+
+async def check_resolver(server: FakeHubServer, batch_size: int) -> Dict:
+    """Resolver'ı doğrudan, app olmadan ölçer"""
+    from api.user_resolver import UserResolver
+
+    resolver = UserResolver(server.base_url, batch_size=batch_size)
+    try:
+        # Büyük liste: ceil(n / batch_size) istek, hiçbiri sınırı aşmaz
+        before = server.calls
+        fids = list(range(100_000, 100_000 + batch_size * 10 + 3))
+        await resolver.resolve_many(fids)
+        bulk_requests = server.calls - before
+
+        # Aynı FID'leri isteyen eşzamanlı çağrılar tek istekte birleşir
+        before = server.calls
+        shared = list(range(200_000, 200_000 + batch_size))
+        await asyncio.gather(*[resolver.resolve_many(shared) for _ in range(20)])
+        concurrent_requests = server.calls - before
+
+        # Kayıtlı olmayan FID'ler negatif cache'ten döner, tekrar sorulmaz
+        missing = [fid * server.missing_every for fid in range(20_000, 20_010)]
+        await resolver.resolve_many(missing)
+        before = server.calls
+        resolved = await resolver.resolve_many(missing)
+        negative_requests = server.calls - before
+    finally:
+        await resolver.aclose()
+
+    return {
+        "bulk_fids": len(fids),
+        "bulk_requests": bulk_requests,
+        "expected_bulk_requests": -(-len(fids) // batch_size),
+        "concurrent_requests": concurrent_requests,
+        "negative_repeat_requests": negative_requests,
+        "negative_resolved": len(resolved),
+        "max_batch_seen": max(len(request) for request in server.requests)
+    }
+
+
+async def check_pages(server: FakeHubServer, pages: int) -> Dict:
+    """Gerçek /api/frame/matches istekleri: sayfa başına upstream tur sayısı"""
+    import httpx
+    from api.main import app
+
+    per_page: List[int] = []
+    latencies: List[float] = []
+    await app.router.startup()
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+            for _ in range(pages):
+                before = server.calls
+                started = time.perf_counter()
+                response = await client.post("/api/frame/matches", json={
+                    "untrustedData": {"fid": random.randint(1000, 99999)}
+                })
+                latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+                per_page.append(server.calls - before)
+    finally:
+        await app.router.shutdown()
+
+    latencies.sort()
+    return {
+        "pages": pages,
+        "max_round_trips_per_page": max(per_page),
+        "total_round_trips": sum(per_page),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2)
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05, help="sahte hub gecikmesi (sn)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    with FakeHubServer(latency=args.latency, max_batch=args.batch_size) as server:
+        # app import edilmeden önce: resolver sahte hub'a gitsin
+        os.environ["FARCASTER_API_URL"] = server.base_url
+        os.environ["FARCASTER_BATCH_SIZE"] = str(args.batch_size)
+        os.environ.setdefault("OPENAI_API_KEY", "bench")
+        os.environ.setdefault("OPENAI_BASE_URL", "http://127.0.0.1:9/v1")
+        os.environ.setdefault("PRERENDER_IMAGES", "0")
+        resolver = asyncio.run(check_resolver(server, args.batch_size))
+        pages = asyncio.run(check_pages(server, args.pages))
+        failures = server.failures
+
+    print(json.dumps({"resolver": resolver, "matches_pages": pages}, indent=2))
+
+    problems = []
+    if failures:
+        problems.append(f"hub rejected {failures} requests (batch size limit)")
+    if resolver["bulk_requests"] != resolver["expected_bulk_requests"]:
+        problems.append(f"bulk lookup used {resolver['bulk_requests']} requests, "
+                        f"expected {resolver['expected_bulk_requests']}")
+    if resolver["concurrent_requests"] != 1:
+        problems.append(f"concurrent lookups were not coalesced "
+                        f"({resolver['concurrent_requests']} requests)")
+    if resolver["negative_repeat_requests"] or resolver["negative_resolved"]:
+        problems.append("unknown fids were looked up again instead of negative-cached")
+    if pages["max_round_trips_per_page"] > 1:
+        problems.append(f"a matches page made {pages['max_round_trips_per_page']} hub round trips")
+    for problem in problems:
+        print(f"FAIL {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
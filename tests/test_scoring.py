@@ -0,0 +1,75 @@
+"""
+BatchScorer (vektörel) ile PersonalityAnalyzer.calculate_compatibility (skaler)
+aynı skoru vermeli; topluluk skoru iki tarafta da 0.85'e sabitlenir
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from api import personality, scoring
+from api.personality import PERSONALITY_PROFILES, PersonalityAnalyzer
+from api.scoring import BatchScorer, CandidatePool, FeatureVocab
+
+TYPES = list(PERSONALITY_PROFILES)
+COMMUNITY = 0.85
+
+
+class _FixedRng:
+    def uniform(self, low, high, size):
+        return np.full(size, COMMUNITY)
+
+
+def _reference_breakdown(p1, p2):
+    """Bitmask öncesi, küme tabanlı orijinal kurallar"""
+    token = 0.9 if set(p1["token_preference"]) & set(p2["token_preference"]) else 0.5
+    diff = abs(p1["risk_tolerance"] - p2["risk_tolerance"])
+    risk = 1.0 if diff < 10 else 0.7 if diff < 30 else 0.4
+    trait = (len(set(p1["traits"]) & set(p2["traits"]))
+             / max(len(p1["traits"]), len(p2["traits"])))
+    ideal1, ideal2 = p1.get("ideal_match", []), p2.get("ideal_match", [])
+    avoid1, avoid2 = p1.get("avoid", []), p2.get("avoid", [])
+    if any(x in ideal1 for x in ideal2) or any(x in ideal2 for x in ideal1):
+        bonus = 1.0
+    elif any(x in avoid1 for x in avoid2) or any(x in avoid2 for x in avoid1):
+        bonus = 0.3
+    else:
+        bonus = 0.6
+    return {
+        "token_preferences": round(token * 0.30 * 100 / 0.30, 1),
+        "risk_tolerance": round(risk * 0.25 * 100 / 0.25, 1),
+        "personality_traits": round(trait * 0.20 * 100 / 0.20, 1),
+        "ideal_match_factor": round(bonus * 0.15 * 100 / 0.15, 1),
+        "community_vibe": round(COMMUNITY * 100, 1)
+    }
+
+
+@pytest.fixture
+def pinned_community(monkeypatch):
+    monkeypatch.setattr(personality.random, "uniform", lambda low, high: COMMUNITY)
+
+
+@pytest.mark.parametrize("type1,type2", list(itertools.product(TYPES, repeat=2)))
+def test_batch_matches_scalar(pinned_community, type1, type2):
+    analyzer = PersonalityAnalyzer()
+    scorer = BatchScorer(analyzer, rng=_FixedRng())
+    profile1, profile2 = PERSONALITY_PROFILES[type1], PERSONALITY_PROFILES[type2]
+
+    pool = CandidatePool([1], [profile2], [type2])
+    batch = scorer._compatibility_dict(scorer.score(profile1, pool), 0)
+    scalar = analyzer.calculate_compatibility(profile1, profile2)
+
+    assert batch == scalar
+    assert scalar["breakdown"] == _reference_breakdown(profile1, profile2)
+
+
+def test_check_uint64_allows_64_names(monkeypatch):
+    monkeypatch.setattr(scoring, "TOKEN_VOCAB", FeatureVocab(f"token{i}" for i in range(64)))
+    scoring.check_uint64()
+
+
+def test_check_uint64_rejects_more_than_64_names(monkeypatch):
+    monkeypatch.setattr(scoring, "TOKEN_VOCAB", FeatureVocab(f"token{i}" for i in range(65)))
+    with pytest.raises(ValueError, match="65 names"):
+        scoring.check_uint64()